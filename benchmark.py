@@ -0,0 +1,330 @@
+"""
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Export benchmark of the Sonder Games add-on, on synthetic rigs and meshes.
+# Run it with:
+# `blender --background --factory-startup --python benchmark.py -- ...`
+
+import bpy
+import sys
+import json
+import time
+import argparse
+import tempfile
+import itertools
+import numpy as np
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(abspath(__file__)))
+
+import sondergames
+
+
+def reset_scene(frames: int):
+    """
+    Empties the blend data, and sets up the scene frame range\t
+    :param frames: the number of frames of the scene\t
+    :return: the scene
+    """
+
+    for collection in (bpy.data.objects, bpy.data.meshes,
+                       bpy.data.armatures, bpy.data.actions):
+        for item in list(collection):
+            collection.remove(item, do_unlink=True)
+
+    scene = bpy.context.scene
+    scene.frame_start = 1
+    scene.frame_end = frames
+    return scene
+
+
+def build_rig(scene, bones: int, frames: int):
+    """
+    Builds an armature of chains of bones, and an action keying the
+    location and rotation of every bone on every frame\t
+    :param scene: the scene in which to link the armature\t
+    :param bones: the number of bones\t
+    :param frames: the number of frames of the action\t
+    :return: the armature object and its action
+    """
+
+    armature = bpy.data.armatures.new("root")
+    obj = bpy.data.objects.new("root", armature)
+    scene.objects.link(obj)
+    scene.objects.active = obj
+
+    # chains of 10 bones, all starting from the first bone
+    bpy.ops.object.mode_set(mode="EDIT")
+    edit_bones = armature.edit_bones
+    for index in range(bones):
+        bone = edit_bones.new("bone_%03d" % index)
+        chain, link = divmod(index, 10)
+        bone.head = (chain * 0.1, 0.0, link * 0.1)
+        bone.tail = (chain * 0.1, 0.0, link * 0.1 + 0.1)
+        if link:
+            bone.parent = edit_bones[index - 1]
+            bone.use_connect = True
+        elif index:
+            bone.parent = edit_bones[0]
+    bpy.ops.object.mode_set(mode="OBJECT")
+
+    action = bpy.data.actions.new("AS_Benchmark")
+    obj.animation_data_create()
+    obj.animation_data.action = action
+
+    rng = np.random.RandomState(bones * frames)
+    times = np.arange(1, frames + 1, dtype=np.float32)
+    for bone in obj.pose.bones:
+        bone.rotation_mode = "QUATERNION"
+        path = 'pose.bones["%s"].' % bone.name
+        for prop, count in (("location", 3), ("rotation_quaternion", 4)):
+            for index in range(count):
+                fcurve = action.fcurves.new(path + prop, index, bone.name)
+                values = np.sin(times * rng.uniform(0.05, 0.2) +
+                                rng.uniform(0, 6)) * 0.1
+                if prop == "rotation_quaternion" and index == 0:
+                    values += 1.0
+                points = fcurve.keyframe_points
+                points.add(frames)
+                points.foreach_set("co", np.column_stack((times, values))
+                                   .astype(np.float32).ravel())
+                fcurve.update()
+
+    return obj, action
+
+
+def build_mesh(scene, armature, vertices: int, shape_keys: int,
+               uv_layers: int):
+    """
+    Builds a grid mesh skinned to an armature, with shape keys and uv
+    layers\t
+    :param scene: the scene in which to link the mesh\t
+    :param armature: the armature object deforming the mesh\t
+    :param vertices: the approximate number of vertices\t
+    :param shape_keys: the number of shape keys, besides the basis\t
+    :param uv_layers: the number of uv layers\t
+    :return: the mesh object
+    """
+
+    side = max(2, int(round(vertices ** 0.5)))
+    x, y = np.meshgrid(np.linspace(-1, 1, side), np.linspace(-1, 1, side))
+    cos = np.column_stack((x.ravel(), y.ravel(), np.zeros(side * side)))
+
+    quads = np.arange(side * side).reshape(side, side)[:-1, :-1].ravel()
+    loops = np.column_stack((quads, quads + 1, quads + side + 1,
+                             quads + side)).ravel()
+
+    mesh = bpy.data.meshes.new("SK_Benchmark")
+    mesh.vertices.add(len(cos))
+    mesh.vertices.foreach_set("co", cos.astype(np.float32).ravel())
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set("vertex_index", loops.astype(np.int32))
+    mesh.polygons.add(len(quads))
+    mesh.polygons.foreach_set("loop_start",
+                              np.arange(0, len(loops), 4, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_total",
+                              np.full(len(quads), 4, dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+    for index in range(uv_layers):
+        mesh.uv_textures.new("UVMap_%d" % index)
+        uvs = cos[loops, :2] * (index + 1) * 0.5 + 0.5
+        mesh.uv_layers[index].data.foreach_set(
+            "uv", uvs.astype(np.float32).ravel())
+
+    obj = bpy.data.objects.new("SK_Benchmark", mesh)
+    scene.objects.link(obj)
+    obj.parent = armature
+    modifier = obj.modifiers.new("Armature", "ARMATURE")
+    modifier.object = armature
+
+    # each bone deforms a band of the grid
+    bones = armature.data.bones
+    band = np.array_split(np.arange(len(cos)), len(bones))
+    for bone, indices in zip(bones, band):
+        group = obj.vertex_groups.new(bone.name)
+        group.add(indices.tolist(), 1.0, "REPLACE")
+
+    if shape_keys:
+        obj.shape_key_add("Basis")
+        rng = np.random.RandomState(vertices)
+        for index in range(shape_keys):
+            key = obj.shape_key_add("Key_%d" % index)
+            moved = cos.copy()
+            mask = rng.uniform(size=len(cos)) < 0.3
+            moved[mask, 2] += rng.uniform(-0.1, 0.1, size=mask.sum())
+            key.data.foreach_set("co", moved.astype(np.float32).ravel())
+
+    return obj
+
+
+def time_call(repeat: int, setup, function, *args) -> list:
+    """
+    Times several calls of a function\t
+    :param repeat: the number of calls\t
+    :param setup: a function called without arguments before each timed
+    call, or None\t
+    :param function: the function to call\t
+    :param args: the arguments of the function\t
+    :return: the list of durations, in seconds
+    """
+
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function(*args)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def make_result(kind: str, params: dict, durations: list,
+                operator) -> dict:
+    """
+    Formats the result of a benchmark case\t
+    :param kind: the kind of export benchmarked\t
+    :param params: the parameters of the synthetic scene\t
+    :param durations: the list of durations, in seconds\t
+    :param operator: the CliOperator used to export\t
+    :return: the result, as a dict
+    """
+
+    result = dict(params)
+    result.update(kind=kind,
+                  durations=durations,
+                  min=min(durations),
+                  median=float(np.median(durations)),
+                  errors=[m for level, m in operator.messages
+                          if level == "ERROR"])
+    print("%s %r: %.3f sec" % (kind, params, result["min"]))
+    return result
+
+
+def bench_actions(export_path, bones_list, frames_list, repeat,
+                  warm_cache) -> list:
+    """
+    Times export_action_sequence for every bones and frames combination,
+    the bake cache being cleared before each call\t
+    :param warm_cache: whether to also time the exports hitting the bake
+    cache\t
+    :return: the list of results
+    """
+
+    results = []
+    for bones, frames in itertools.product(bones_list, frames_list):
+        scene = reset_scene(frames)
+        scene.export_path = export_path
+        armature, action = build_rig(scene, bones, frames)
+        operator = sondergames.CliOperator(True, False)
+        bake_cache = sondergames.export_fbx_bin.fbx_bake_cache
+        durations = time_call(repeat, bake_cache.clear,
+                              sondergames.export_action_sequence,
+                              operator, bpy.context, action)
+        results.append(make_result("action",
+                                   dict(bones=bones, frames=frames),
+                                   durations, operator))
+
+        if warm_cache:
+            operator = sondergames.CliOperator(True, False)
+            sondergames.export_action_sequence(operator, bpy.context, action)
+            durations = time_call(repeat, None,
+                                  sondergames.export_action_sequence,
+                                  operator, bpy.context, action)
+            results.append(make_result("action_warm_cache",
+                                       dict(bones=bones, frames=frames),
+                                       durations, operator))
+    return results
+
+
+def bench_meshes(export_path, bones, vertices_list, shape_keys_list,
+                 uv_layers_list, repeat) -> list:
+    """
+    Times export_skeletal_mesh for every vertices, shape keys and uv
+    layers combination\t
+    :return: the list of results
+    """
+
+    results = []
+    for vertices, shape_keys, uv_layers in itertools.product(
+            vertices_list, shape_keys_list, uv_layers_list):
+        scene = reset_scene(1)
+        scene.export_path = export_path
+        armature, action = build_rig(scene, bones, 1)
+        obj = build_mesh(scene, armature, vertices, shape_keys, uv_layers)
+        operator = sondergames.CliOperator(True, False)
+        durations = time_call(repeat, None, sondergames.export_skeletal_mesh,
+                              operator, bpy.context, [armature, obj],
+                              "SK_Benchmark")
+        results.append(make_result("skeletal_mesh",
+                                   dict(bones=bones, vertices=vertices,
+                                        shape_keys=shape_keys,
+                                        uv_layers=uv_layers),
+                                   durations, operator))
+    return results
+
+
+def int_list(text: str) -> list:
+    return [int(value) for value in text.split(",") if value]
+
+
+def main(argv: list):
+    parser = argparse.ArgumentParser(
+        prog="blender --background --factory-startup "
+             "--python benchmark.py --",
+        description="Time the Sonder Games exports on synthetic scenes")
+    parser.add_argument("--bones", type=int_list, default=[20, 80, 250])
+    parser.add_argument("--frames", type=int_list, default=[60, 240, 600])
+    parser.add_argument("--mesh-bones", type=int, default=80,
+                        help="number of bones of the skeletal meshes")
+    parser.add_argument("--vertices", type=int_list,
+                        default=[10000, 50000, 250000])
+    parser.add_argument("--shape-keys", type=int_list, default=[0, 20])
+    parser.add_argument("--uv-layers", type=int_list, default=[1, 3])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-actions", action="store_true")
+    parser.add_argument("--skip-meshes", action="store_true")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="also time the actions exported from the bake "
+                             "cache")
+    parser.add_argument("--output", default="benchmark.json",
+                        help="path of the JSON results")
+    args = parser.parse_args(argv)
+
+    sondergames.register()
+    export_path = tempfile.mkdtemp(prefix="sg_benchmark_")
+
+    results = []
+    if not args.skip_actions:
+        results += bench_actions(export_path, args.bones, args.frames,
+                                 args.repeat, args.warm_cache)
+    if not args.skip_meshes:
+        results += bench_meshes(export_path, args.mesh_bones, args.vertices,
+                                args.shape_keys, args.uv_layers, args.repeat)
+
+    with open(args.output, "w") as output:
+        json.dump({"blender": bpy.app.version_string,
+                   "addon": sondergames.bl_info["version"],
+                   "as_export_kwargs": sorted(
+                       (k, sorted(v) if isinstance(v, set) else v) for k, v
+                       in sondergames.as_export_kwargs.items()),
+                   "sk_export_kwargs": sorted(
+                       (k, sorted(v) if isinstance(v, set) else v) for k, v
+                       in sondergames.sk_export_kwargs.items()),
+                   "results": results}, output, indent=4)
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
@@ -25,9 +25,14 @@ import array
 import datetime
 import math
 import os
+import struct
+import sys
+import threading
 import time
+import zlib
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from itertools import zip_longest, chain
 
 if "bpy" in locals():
@@ -41,6 +46,7 @@ if "bpy" in locals():
 
 import bpy
 import bpy_extras
+import numpy as np
 from mathutils import Vector, Matrix
 
 from . import encode_bin, data_types, fbx_utils
@@ -80,8 +86,7 @@ from .fbx_utils import (
     elem_data_single_bool, elem_data_single_int16, elem_data_single_int32, elem_data_single_int64,
     elem_data_single_float32, elem_data_single_float64,
     elem_data_single_bytes, elem_data_single_string, elem_data_single_string_unicode,
-    elem_data_single_bool_array, elem_data_single_int32_array, elem_data_single_int64_array,
-    elem_data_single_float32_array, elem_data_single_float64_array, elem_data_vec_float64,
+    elem_data_vec_float64,
     # FBX element properties.
     elem_properties, elem_props_set, elem_props_compound,
     # FBX element properties handling templates.
@@ -105,6 +110,91 @@ convert_mm_to_inch = units_convertor("millimeter", "inch")
 convert_rad_to_deg = units_convertor("radian", "degree")
 convert_rad_to_deg_iter = units_convertor_iter("radian", "degree")
 
+# Settings specific to this exporter, as (name, default value) pairs, appended to io_scene_fbx's FBXExportSettings.
+FBX_EXPORT_SETTINGS_EXTRA = (
+    # Bake armature animations by only evaluating their pose, instead of a whole scene frame_set(), when possible.
+    ("bake_anim_pose_only", False),
+    # Bake constraint-free armature animations straight from their action's fcurves, without evaluating the scene,
+    # when possible (see fbx_animations_analytic). 'CHECK' bakes them both ways, reports the largest differences and
+    # writes the usual bake.
+    ("bake_anim_analytic", False),
+    # Write Objects elements to the file as soon as they are generated (see FBXStreamWriter).
+    ("use_stream_write", False),
+    # Maximum errors (location in Blender units, rotation in degrees, scale, shape keys in percents) of the baked
+    # animation simplification (see fbx_animations_simplify), None to use AnimationCurveNodeWrapper.simplify().
+    ("bake_anim_simplify_error", None),
+    # zlib level of compressed array properties, and number of threads compressing them (see FBXArrayCompression).
+    ("compression_level", 1),
+    ("compression_workers", 0),
+    # Mapping of armature object names to the names of their bones to leave out of the export, their children being
+    # re-parented to their nearest exported ancestor (see fbx_bones_pruned and fbx_object_parent).
+    ("exclude_bones", None),
+)
+# Last setting is the set of bones given by exclude_bones (see fbx_bones_pruned), computed from it.
+FBXExportSettings = namedtuple("FBXExportSettings",
+                               FBXExportSettings._fields + tuple(name for name, _default in FBX_EXPORT_SETTINGS_EXTRA) +
+                               ("pruned_bones",))
+
+
+def np_to_array(arr, typecode):
+    """
+    Return given numpy array as a flat array.array of given data_types typecode (as expected by FBX elements).
+    """
+    return array.array(typecode, np.ascontiguousarray(arr, dtype=np.dtype(typecode)).tobytes())
+
+
+def np_unique_rows(data, width):
+    """
+    Deduplicate the rows (of given width) of given flat numpy array, by sorting them as raw bytes.
+    Return the unique rows (sorted by their bytes), and the index of each original row into them.
+    """
+    rows = np.ascontiguousarray(data.reshape(-1, width) + data.dtype.type(0.0))  # Merge -0.0 into 0.0, like tuples do.
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * width))).ravel()
+    _keys, unique_idx, inverse_idx = np.unique(keys, return_index=True, return_inverse=True)
+    return rows[unique_idx], inverse_idx.ravel()
+
+
+# Progress of an export, as yielded by export steps generators (e.g. save_single_steps()) after each baked frame.
+FBXExportProgress = namedtuple("FBXExportProgress", ("frame", "nbr_frames"))
+
+
+def fbx_run_steps(steps):
+    """
+    Run given export steps generator to its end, and return its value.
+    """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class PerfMonTimings(PerfMon):
+    """
+    PerfMon also accumulating the wall-clock duration (in seconds) of its steps into a timings dict,
+    under the phase name given to each step (steps without a phase are only printed).
+    """
+    def __init__(self, timings=None):
+        super().__init__()
+        self.timings = timings
+        self.phase = None
+        self.phase_start = 0.0
+
+    def phase_end(self):
+        if self.timings is not None and self.phase is not None:
+            self.timings[self.phase] = self.timings.get(self.phase, 0.0) + time.perf_counter() - self.phase_start
+        self.phase = None
+
+    def step(self, message="", phase=None):
+        self.phase_end()
+        super().step(message)
+        self.phase = phase
+        self.phase_start = time.perf_counter()
+
+    def level_down(self, message=""):
+        self.phase_end()
+        super().level_down(message)
+
 
 # ##### Templates #####
 # TODO: check all those "default" values, they should match Blender's default as much as possible, I guess?
@@ -815,11 +905,6 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     """
     Write the Mesh (Geometry) data block.
     """
-    # Ugly helper... :/
-    def _infinite_gen(val):
-        while 1:
-            yield val
-
     me_key, me, _free = scene_data.data_meshes[me_obj]
 
     # In case of multiple instances of same mesh, only write it once!
@@ -892,30 +977,42 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     edges_map = {}
     edges_nbr = 0
     if t_ls and t_pvi:
-        t_ls = set(t_ls)
-        todo_edges = [None] * len(me.edges) * 2
-        # Sigh, cannot access edge.key through foreach_get... :/
-        me.edges.foreach_get("vertices", todo_edges)
-        todo_edges = set((v1, v2) if v1 < v2 else (v2, v1) for v1, v2 in zip(*(iter(todo_edges),) * 2))
-
-        li = 0
-        vi = vi_start = t_pvi[0]
-        for li_next, vi_next in enumerate(t_pvi[1:] + t_pvi[:1], start=1):
-            if li_next in t_ls:  # End of a poly's loop.
-                vi2 = vi_start
-                vi_start = vi_next
-            else:
-                vi2 = vi_next
+        pvi = np.array(t_pvi, dtype=np.int64)
+        loops_nbr = len(pvi)
+        loops_idx = np.arange(loops_nbr)
+        # Loop starting a poly, and first loop of each loop's poly.
+        ls_first = np.zeros(loops_nbr + 1, dtype=np.bool_)
+        ls_first[0] = True
+        ls_first[[ls for ls in t_ls if ls < loops_nbr]] = True
+        ls_poly = np.maximum.accumulate(np.where(ls_first[:-1], loops_idx, 0))
+        # Each loop's edge goes to the next loop's vertex, or back to the poly's first one for its last loop
+        # (last loop of the array wrapping to the very first vertex).
+        li_next = loops_idx + 1
+        li_next[-1] = 0
+        ls_last = ls_first[1:]
+        li_next[ls_last] = ls_poly[ls_last]
+        pvi_next = pvi[li_next]
+        lo = np.minimum(pvi, pvi_next)
+        hi = np.maximum(pvi, pvi_next)
+        vert_nbr = int(max(len(me.vertices), pvi.max() + 1))
+        loops_ekey = lo * vert_nbr + hi
 
-            e_key = (vi, vi2) if vi < vi2 else (vi2, vi)
-            if e_key in todo_edges:
-                t_eli.append(li)
-                todo_edges.remove(e_key)
-                edges_map[e_key] = edges_nbr
-                edges_nbr += 1
-
-            vi = vi_next
-            li = li_next
+        # Sigh, cannot access edge.key through foreach_get... :/
+        edges_verts = np.empty(len(me.edges) * 2, dtype=np.int32)
+        me.edges.foreach_get("vertices", edges_verts)
+        edges_verts = np.sort(edges_verts.reshape(-1, 2).astype(np.int64), axis=1)
+        edges_ekey = edges_verts[:, 0] * vert_nbr + edges_verts[:, 1]
+
+        # First loop using each (real) edge, in loops order.
+        loops_real = np.flatnonzero(np.in1d(loops_ekey, edges_ekey))
+        _ekeys, ekeys_first = np.unique(loops_ekey[loops_real], return_index=True)
+        eli = np.sort(loops_real[ekeys_first])
+
+        t_eli = np_to_array(eli, data_types.ARRAY_INT32)
+        edges_nbr = len(eli)
+        edges_map = dict(zip(zip(lo[eli].tolist(), hi[eli].tolist()), range(edges_nbr)))
+        t_ls = set(t_ls)
+        del pvi, loops_idx, ls_first, ls_poly, li_next, ls_last, pvi_next, lo, hi, loops_ekey, edges_verts, edges_ekey
     # End of edges!
 
     # We have to ^-1 last index of each loop.
@@ -1060,10 +1157,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     # Write VertexColor Layers.
     vcolnumber = len(me.vertex_colors)
     if vcolnumber:
-        def _coltuples_gen(raw_cols):
-            return zip(*(iter(raw_cols),) * 3 + (_infinite_gen(1.0),))  # We need a fake alpha...
-
-        t_lc = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 3
+        t_lc = np.empty(len(me.loops) * 3, dtype=np.float32)
         for colindex, collayer in enumerate(me.vertex_colors):
             collayer.data.foreach_get("color", t_lc)
             lay_vcol = elem_data_single_int32(geom, b"LayerElementColor", colindex)
@@ -1072,24 +1166,19 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_vcol, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_vcol, b"ReferenceInformationType", b"IndexToDirect")
 
-            col2idx = tuple(set(_coltuples_gen(t_lc)))
-            elem_data_single_float64_array(lay_vcol, b"Colors", chain(*col2idx))  # Flatten again...
-
-            col2idx = {col: idx for idx, col in enumerate(col2idx)}
-            elem_data_single_int32_array(lay_vcol, b"ColorIndex", (col2idx[c] for c in _coltuples_gen(t_lc)))
-            del col2idx
+            col2idx, col_idx = np_unique_rows(t_lc, 3)
+            col2idx = np.hstack((col2idx, np.ones((len(col2idx), 1), dtype=col2idx.dtype)))  # We need a fake alpha...
+            elem_data_single_float64_array(lay_vcol, b"Colors", np_to_array(col2idx, data_types.ARRAY_FLOAT64))
+            elem_data_single_int32_array(lay_vcol, b"ColorIndex", np_to_array(col_idx, data_types.ARRAY_INT32))
+            del col2idx, col_idx
         del t_lc
-        del _coltuples_gen
 
     # Write UV layers.
     # Note: LayerElementTexture is deprecated since FBX 2011 - luckily!
     #       Textures are now only related to materials, in FBX!
     uvnumber = len(me.uv_layers)
     if uvnumber:
-        def _uvtuples_gen(raw_uvs):
-            return zip(*(iter(raw_uvs),) * 2)
-
-        t_luv = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 2
+        t_luv = np.empty(len(me.loops) * 2, dtype=np.float32)
         for uvindex, uvlayer in enumerate(me.uv_layers):
             uvlayer.data.foreach_get("uv", t_luv)
             lay_uv = elem_data_single_int32(geom, b"LayerElementUV", uvindex)
@@ -1098,14 +1187,11 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_uv, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_uv, b"ReferenceInformationType", b"IndexToDirect")
 
-            uv2idx = tuple(set(_uvtuples_gen(t_luv)))
-            elem_data_single_float64_array(lay_uv, b"UV", chain(*uv2idx))  # Flatten again...
-
-            uv2idx = {uv: idx for idx, uv in enumerate(uv2idx)}
-            elem_data_single_int32_array(lay_uv, b"UVIndex", (uv2idx[uv] for uv in _uvtuples_gen(t_luv)))
-            del uv2idx
+            uv2idx, uv_idx = np_unique_rows(t_luv, 2)
+            elem_data_single_float64_array(lay_uv, b"UV", np_to_array(uv2idx, data_types.ARRAY_FLOAT64))
+            elem_data_single_int32_array(lay_uv, b"UVIndex", np_to_array(uv_idx, data_types.ARRAY_INT32))
+            del uv2idx, uv_idx
         del t_luv
-        del _uvtuples_gen
 
     # Face's materials.
     me_fbxmats_idx = scene_data.mesh_mat_indices.get(me)
@@ -1452,26 +1538,49 @@ def fbx_data_armature_elements(root, arm_obj, scene_data):
             elem_data_single_int32(fbx_skin, b"Version", FBX_DEFORMER_SKIN_VERSION)
             elem_data_single_float64(fbx_skin, b"Link_DeformAcuracy", 50.0)  # Only vague idea what it is...
 
-            # Pre-process vertex weights (also to check vertices assigned ot more than four bones).
+            # Cluster of each vertex group (-1 if none), vertex groups of excluded bones going to the cluster of
+            # their nearest exported ancestor.
             ob = ob_obj.bdata
-            bo_vg_idx = {bo_obj.bdata.name: ob.vertex_groups[bo_obj.bdata.name].index
-                         for bo_obj in clusters.keys() if bo_obj.bdata.name in ob.vertex_groups}
-            valid_idxs = set(bo_vg_idx.values())
-            vgroups = {vg.index: OrderedDict() for vg in ob.vertex_groups}
-            verts_vgroups = (sorted(((vg.group, vg.weight) for vg in v.groups if vg.weight and vg.group in valid_idxs),
-                                    key=lambda e: e[1], reverse=True)
-                             for v in me.vertices)
-            for idx, vgs in enumerate(verts_vgroups):
-                for vg_idx, w in vgs:
-                    vgroups[vg_idx][idx] = w
-
-            for bo_obj, clstr_key in clusters.items():
+            arm_bones = arm_obj.bdata.data.bones
+            exclude = (scene_data.settings.exclude_bones.get(arm_obj.bdata.name, ())
+                       if scene_data.settings.exclude_bones else ())
+            clusters_idx = {bo_obj.bdata.name: idx for idx, bo_obj in enumerate(clusters.keys())}
+            vg_clstr = np.full(len(ob.vertex_groups), -1, dtype=np.int64)
+            for vg in ob.vertex_groups:
+                bo = arm_bones.get(vg.name)
+                while bo is not None and bo.name in exclude:
+                    bo = bo.parent
+                if bo is not None:
+                    vg_clstr[vg.index] = clusters_idx.get(bo.name, -1)
+
+            # Pre-process vertex weights, as flat (vertex, cluster, weight) arrays sorted by cluster and vertex.
+            verts_nbr_vgroups = np.fromiter((len(v.groups) for v in me.vertices), dtype=np.int64,
+                                            count=len(me.vertices))
+            vgroups_data = np.fromiter(chain.from_iterable(chain.from_iterable((vg.group, vg.weight) for vg in v.groups)
+                                                           for v in me.vertices),
+                                       dtype=np.float64, count=int(verts_nbr_vgroups.sum()) * 2).reshape(-1, 2)
+            vgroups_vert = np.repeat(np.arange(len(me.vertices), dtype=np.int64), verts_nbr_vgroups)
+            vgroups_clstr = vg_clstr[vgroups_data[:, 0].astype(np.int64)]
+            vgroups_weight = vgroups_data[:, 1]
+            valid = (vgroups_weight != 0.0) & (vgroups_clstr >= 0)
+            # Sorting by (cluster, vertex), and summing weights of vertex groups merged into the same cluster.
+            vgroups_keys, vgroups_inv = np.unique(vgroups_clstr[valid] * len(me.vertices) + vgroups_vert[valid],
+                                                  return_inverse=True)
+            vgroups_weight = np.bincount(vgroups_inv.ravel(), weights=vgroups_weight[valid],
+                                         minlength=len(vgroups_keys))
+            vgroups_clstr, vgroups_vert = vgroups_keys // len(me.vertices), vgroups_keys % len(me.vertices)
+
+            for clstr_idx, (bo_obj, clstr_key) in enumerate(clusters.items()):
                 bo = bo_obj.bdata
                 # Find which vertices are affected by this bone/vgroup pair, and matching weights.
                 # Note we still write a cluster for bones not affecting the mesh, to get 'rest pose' data
                 # (the TransformBlah matrices).
-                vg_idx = bo_vg_idx.get(bo.name, None)
-                indices, weights = ((), ()) if vg_idx is None or not vgroups[vg_idx] else zip(*vgroups[vg_idx].items())
+                vg_start, vg_end = np.searchsorted(vgroups_clstr, (clstr_idx, clstr_idx + 1))
+                if vg_start == vg_end:
+                    indices = weights = ()
+                else:
+                    indices = np_to_array(vgroups_vert[vg_start:vg_end], data_types.ARRAY_INT32)
+                    weights = np_to_array(vgroups_weight[vg_start:vg_end], data_types.ARRAY_FLOAT64)
 
                 # Create the cluster.
                 fbx_clstr = elem_data_single_int64(root, b"Deformer", get_fbx_uuid_from_key(clstr_key))
@@ -1576,7 +1685,7 @@ def fbx_data_object_elements(root, ob_obj, scene_data):
     elem_data_single_int32(model, b"Version", FBX_MODELS_VERSION)
 
     # Object transform info.
-    loc, rot, scale, matrix, matrix_rot = ob_obj.fbx_object_tx(scene_data)
+    loc, rot, scale, matrix, matrix_rot = fbx_object_tx(scene_data, ob_obj)
     rot = tuple(convert_rad_to_deg_iter(rot))
 
     tmpl = elem_props_template_init(scene_data.templates, b"Model")
@@ -1632,11 +1741,6 @@ def fbx_data_animation_elements(root, scene_data):
         return
     scene = scene_data.scene
 
-    fps = scene.render.fps / scene.render.fps_base
-
-    def keys_to_ktimes(keys):
-        return (int(v) for v in convert_sec_to_ktime_iter((f / fps for f, _v in keys)))
-
     # Animation stacks.
     for astack_key, alayers, alayer_key, name, f_start, f_end in animations:
         astack = elem_data_single_int64(root, b"AnimationStack", get_fbx_uuid_from_key(astack_key))
@@ -1701,8 +1805,10 @@ def fbx_data_animation_elements(root, scene_data):
                         # And now, the *real* data!
                         elem_data_single_float64(acurve, b"Default", def_value)
                         elem_data_single_int32(acurve, b"KeyVer", FBX_ANIM_KEY_VERSION)
-                        elem_data_single_int64_array(acurve, b"KeyTime", keys_to_ktimes(keys))
-                        elem_data_single_float32_array(acurve, b"KeyValueFloat", (v for _f, v in keys))
+                        elem_data_single_int64_array(acurve, b"KeyTime",
+                                                     np_to_array(keys.times, data_types.ARRAY_INT64))
+                        elem_data_single_float32_array(acurve, b"KeyValueFloat",
+                                                       np_to_array(keys.values, data_types.ARRAY_FLOAT32))
                         elem_data_single_int32_array(acurve, b"KeyAttrFlags", keyattr_flags)
                         elem_data_single_float32_array(acurve, b"KeyAttrDataFloat", keyattr_datafloat)
                         elem_data_single_int32_array(acurve, b"KeyAttrRefCount", (nbr_keys,))
@@ -1754,6 +1860,59 @@ def fbx_mat_properties_from_texture(tex):
     return tex_fbx_props
 
 
+def fbx_bones_pruned(exclude_bones):
+    """
+    Return the set of bones (ObjectWrapper) given by exclude_bones (see FBX_EXPORT_SETTINGS_EXTRA).
+    Those are left out by fbx_skeleton_from_armature, hence neither baked nor written, and their skin weights go to
+    their nearest exported ancestor.
+    """
+    pruned = set()
+    for arm_name, bones_names in (exclude_bones or {}).items():
+        arm = bpy.data.objects.get(arm_name)
+        if arm is not None and arm.type == 'ARMATURE':
+            pruned.update(bo_obj for bo_obj in ObjectWrapper(arm).bones if bo_obj.bdata.name in bones_names)
+    return frozenset(pruned)
+
+
+def fbx_object_parent(settings, ob_obj):
+    """
+    Return the FBX parent of ob_obj, i.e. its parent, or its nearest ancestor not pruned (see fbx_bones_pruned).
+    """
+    parent = ob_obj.parent
+    while parent in settings.pruned_bones:
+        parent = parent.parent
+    return parent
+
+
+def fbx_object_matrix(scene_data, ob_obj, rest=False):
+    """
+    Same as ob_obj.fbx_object_matrix(scene_data, rest=rest), bones whose parent is pruned (see fbx_bones_pruned)
+    getting their transform relative to their FBX parent (see fbx_object_parent).
+    """
+    if not (ob_obj.is_bone and ob_obj.parent in scene_data.settings.pruned_bones):
+        return ob_obj.fbx_object_matrix(scene_data, rest=rest)
+    # Both global matrices have the same bones correction and global matrix as fbx_object_matrix() applies to local
+    # ones, hence the same local FBX transform, only relative to another parent.
+    parent = fbx_object_parent(scene_data.settings, ob_obj)
+    par_matrix = parent.fbx_object_matrix(scene_data, rest=rest, global_space=True)
+    return par_matrix.inverted_safe() * ob_obj.fbx_object_matrix(scene_data, rest=rest, global_space=True)
+
+
+def fbx_object_tx(scene_data, ob_obj, rest=False, rot_euler_compat=None):
+    """
+    Same as ob_obj.fbx_object_tx(scene_data, rest, rot_euler_compat), using fbx_object_matrix().
+    """
+    matrix = fbx_object_matrix(scene_data, ob_obj, rest=rest)
+    loc, rot, scale = matrix.decompose()
+    matrix_rot = rot.to_matrix()
+    # quat -> euler, we always use 'XYZ' order, use ref rotation if given.
+    if rot_euler_compat is not None:
+        rot = rot.to_euler('XYZ', rot_euler_compat)
+    else:
+        rot = rot.to_euler('XYZ')
+    return loc, rot, scale, matrix, matrix_rot
+
+
 def fbx_skeleton_from_armature(scene, settings, arm_obj, objects, data_meshes,
                                data_bones, data_deformers_skin, data_empties, arm_parents):
     """
@@ -1780,7 +1939,7 @@ def fbx_skeleton_from_armature(scene, settings, arm_obj, objects, data_meshes,
         else:
             bones[bo] = True
 
-    bones = OrderedDict((bo, None) for bo, use in bones.items() if use)
+    bones = OrderedDict((bo, None) for bo, use in bones.items() if use and bo not in settings.pruned_bones)
 
     if not bones:
         return
@@ -1824,8 +1983,9 @@ def fbx_generate_leaf_bones(settings, data_bones):
     # find which bons have no children
     child_count = {bo: 0 for bo in data_bones.keys()}
     for bo in data_bones.keys():
-        if bo.parent and bo.parent.is_bone:
-            child_count[bo.parent] += 1
+        bo_par = fbx_object_parent(settings, bo)
+        if bo_par and bo_par.is_bone:
+            child_count[bo_par] += 1
 
     bone_radius_scale = settings.global_scale * 33.0
 
@@ -1852,9 +2012,767 @@ def fbx_generate_leaf_bones(settings, data_bones):
     return leaf_bones
 
 
-def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=None, force_keep=False):
+class AnimationCurveKeys:
+    """
+    Keys of a final animation curve, as KTime (int64) and values (float32) arrays, written as is into FBX.
+    """
+    __slots__ = ("times", "values")
+
+    def __init__(self, times, values):
+        self.times = times
+        self.values = values
+
+    def __len__(self):
+        return len(self.times)
+
+
+class AnimationCurveNodeArrays:
+    """
+    Array-backed equivalent of AnimationCurveNodeWrapper, for baked animations: keys of all curves of the node are
+    stored as a frames array and a (frames x curves) values array, with a matching write flags array.
+    """
+    kinds = AnimationCurveNodeWrapper.kinds
+
+    def __init__(self, elem_key, kind, force_keying, force_startend_keying, default_values=None):
+        self.elem_keys = [elem_key]
+        assert(kind in self.kinds)
+        self.fbx_group = [self.kinds[kind][0]]
+        self.fbx_gname = [self.kinds[kind][1]]
+        self.fbx_props = [self.kinds[kind][2]]
+        self.force_keying = force_keying
+        self.force_startend_keying = force_startend_keying
+        self.frames = None
+        self.values = None
+        self.write = None
+        if default_values is not None:
+            assert(len(default_values) == len(self.fbx_props[0]))
+            self.default_values = default_values
+        else:
+            self.default_values = (0.0) * len(self.fbx_props[0])
+
+    def __bool__(self):
+        # We are 'True' if we do have some validated keyframes...
+        return self.write is not None and bool(self.write.any())
+
+    def add_group(self, elem_key, fbx_group, fbx_gname, fbx_props):
+        """
+        Add another whole group stuff (curvenode, animated item/prop + curvnode/curve identifiers).
+        E.g. Shapes animations is written twice, houra!
+        """
+        assert(len(fbx_props) == len(self.fbx_props[0]))
+        self.elem_keys.append(elem_key)
+        self.fbx_group.append(fbx_group)
+        self.fbx_gname.append(fbx_gname)
+        self.fbx_props.append(fbx_props)
+
+    def set_keyframes(self, frames, values):
+        """
+        Set all keyframes of all curves of the group, from a frames array and a (frames x curves) values array.
+        """
+        assert(values.shape == (len(frames), len(self.fbx_props[0])))
+        self.frames = frames
+        self.values = values
+        self.write = np.ones(values.shape, dtype=np.bool_)  # write everything by default.
+
+    def simplify(self, fac, step, force_keep=False):
+        """
+        Same as AnimationCurveNodeWrapper.simplify(), only enabling samples when:
+            * their values relatively differ from the previous sample ones.
+        """
+        if self.frames is None or not len(self.frames):
+            return
+
+        if fac == 0.0:
+            return
+
+        # So that, with default factor and step values (1), we get:
+        min_reldiff_fac = fac * 1.0e-3  # min relative value evolution: 0.1% of current 'order of magnitude'.
+        min_absdiff_fac = 0.1  # A tenth of reldiff...
+
+        self.write[:] = False
+        are_keyed = [False] * self.values.shape[1]
+        for idx, curve in enumerate(self.values.T.tolist()):
+            curve_write = self.write[:, idx]
+            p_val = p_keyedval = curve[0]
+            for i, val in enumerate(curve):
+                if val == p_val:
+                    # Never write keyframe when value is exactly the same as prev one!
+                    continue
+                # This is contracted form of relative + absolute-near-zero difference (see
+                # AnimationCurveNodeWrapper.simplify()).
+                if abs(val - p_val) > (min_reldiff_fac * max(abs(val) + abs(p_val), min_absdiff_fac)):
+                    # If enough difference from previous sampled value, key this value *and* the previous one!
+                    curve_write[i] = curve_write[i - 1] = True
+                    p_keyedval = val
+                    are_keyed[idx] = True
+                elif abs(val - p_keyedval) > (min_reldiff_fac * max((abs(val) + abs(p_keyedval)), min_absdiff_fac)):
+                    # Else, if enough difference from previous keyed value, key this value only!
+                    curve_write[i] = True
+                    p_keyedval = val
+                    are_keyed[idx] = True
+                p_val = val
+
+        # If we write nothing (action doing nothing) and are in 'force_keep' mode, we key everything! :P
+        # See T41766, T41719, T41605, T41254...
+        if self.force_keying or (force_keep and not self):
+            are_keyed[:] = [True] * len(are_keyed)
+
+        # If we did key something, ensure first and last sampled values are keyed as well.
+        if self.force_startend_keying:
+            for idx, is_keyed in enumerate(are_keyed):
+                if is_keyed:
+                    self.write[0, idx] = self.write[-1, idx] = True
+
+    def simplify_error(self, max_errors):
+        """
+        Alternative to simplify(), each curve keeping only the keys needed to stay within its max error (see
+        fbx_animations_simplify_mask), including first and last ones, which are the loop boundaries of cyclic actions.
+        Return the number of kept keys and of baked keys.
+        """
+        if self.frames is None or not len(self.frames):
+            return 0, 0
+        for idx, max_error in enumerate(max_errors):
+            self.write[:, idx] = fbx_animations_simplify_mask(self.frames, self.values[:, idx], max_error)
+        return int(self.write.sum()), self.write.size
+
+    def get_final_data(self, scene, ref_id, force_keep=False):
+        """
+        Yield final anim data for this 'curvenode' (for all curvenodes defined), with AnimationCurveKeys keys.
+        force_keep is to force to keep a curve even if it only has one valid keyframe.
+        """
+        fps = scene.render.fps / scene.render.fps_base
+        ktimes = convert_sec_to_ktime(self.frames / fps).astype(np.int64)
+        curves = [AnimationCurveKeys(ktimes[curve_write], curve_values[curve_write].astype(np.float32))
+                  for curve_write, curve_values in zip(self.write.T, self.values.T)]
+
+        # Same as AnimationCurveNodeWrapper.get_final_data(): force_keying (bake_anim_use_all_bones) also keeps
+        # single-key curves, some importers needing all bones keyed (see T43004).
+        force_keep = force_keep or self.force_keying
+        for elem_key, fbx_group, fbx_gname, fbx_props in \
+                zip(self.elem_keys, self.fbx_group, self.fbx_gname, self.fbx_props):
+            group_key = get_blender_anim_curve_node_key(scene, ref_id, elem_key, fbx_group)
+            group = OrderedDict()
+            for c, def_val, fbx_item in zip(curves, self.default_values, fbx_props):
+                fbx_item = FBX_ANIM_PROPSGROUP_NAME + "|" + fbx_item
+                curve_key = get_blender_anim_curve_key(scene, ref_id, elem_key, fbx_group, fbx_item)
+                # (curve key, default value, keyframes, write flag).
+                group[fbx_item] = (curve_key, def_val, c,
+                                   True if (len(c) > 1 or (len(c) > 0 and force_keep)) else False)
+            yield elem_key, group_key, group, fbx_group, fbx_gname
+
+
+class BakeCache:
+    """
+    In-session LRU cache of baked animation values, keyed by content keys given by the caller (which is responsible
+    for them changing whenever anything affecting the bake changes).
+    Least recently used entries are evicted once the total size of the cached arrays exceeds max_size (in bytes).
+    """
+    def __init__(self, max_size=256 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        frames, values, _size = entry
+        return frames, values
+
+    def set(self, key, frames, values):
+        size = frames.nbytes + sum(v.nbytes for v in values.values())
+        self.discard(key)
+        if size > self.max_size:
+            return
+        self.entries[key] = (frames, values, size)
+        self.size += size
+        self.resize(self.max_size)
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def resize(self, max_size):
+        self.max_size = max_size
+        while self.size > self.max_size:
+            _key, (_frames, _values, size) = self.entries.popitem(last=False)
+            self.size -= size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+fbx_bake_cache = BakeCache()
+
+
+def fbx_animations_simplify_mask(frames, values, max_error):
+    """
+    Return the mask of the samples of a curve to keep, so that its linear interpolation between kept samples is
+    never further than max_error from any dropped one (Ramer-Douglas-Peucker). First and last samples are always kept.
+    """
+    keep = np.zeros(len(frames), dtype=np.bool_)
+    keep[0] = keep[-1] = True
+    segments = [(0, len(frames) - 1)]
+    while segments:
+        i_start, i_end = segments.pop()
+        if i_end - i_start < 2:
+            continue
+        fac = (frames[i_start + 1:i_end] - frames[i_start]) / (frames[i_end] - frames[i_start])
+        errors = np.abs(values[i_start + 1:i_end] - (values[i_start] + fac * (values[i_end] - values[i_start])))
+        i_max = int(np.argmax(errors))
+        if errors[i_max] > max_error:
+            i_max += i_start + 1
+            keep[i_max] = True
+            segments.append((i_start, i_max))
+            segments.append((i_max, i_end))
+    return keep
+
+
+# Pose bones channels written in bulk by pose-only bakes, with their number of items.
+POSE_ONLY_CHANNELS = (("location", 3), ("rotation_quaternion", 4), ("rotation_euler", 3),
+                      ("rotation_axis_angle", 4), ("scale", 3))
+
+
+def fbx_object_is_static(ob):
+    """
+    Whether given object (if any) and all its parents are neither animated, driven nor constrained.
+    """
+    while ob is not None:
+        anim = ob.animation_data
+        if ob.constraints or (anim is not None and (anim.action or anim.drivers or anim.nla_tracks)):
+            return False
+        ob = ob.parent
+    return True
+
+
+def fbx_animations_pose_only(scene, animdata_ob, animdata_shapes, frames):
+    """
+    Return a function setting the scene to a given frame (one of frames) by only evaluating the action of the single
+    animated armature of animdata_ob, and updating that armature (and its dependencies only), or None when a complete
+    scene.frame_set() is needed, i.e. when anything else is animated, or when the armature is driven or constrained
+    by other objects, driven at subframes, has active NLA tracks, or is animated in ways its action alone does not
+    describe.
+    """
+    is_static = fbx_object_is_static
+
+    if animdata_shapes:
+        return None
+
+    arm = None
+    for ob_obj in animdata_ob:
+        if ob_obj.is_bone:
+            continue
+        ob = ob_obj.bdata
+        if ob.type == 'ARMATURE' and ob.animation_data is not None and ob.animation_data.action is not None:
+            if arm is not None:
+                return None
+            arm = ob
+        elif not is_static(ob):
+            return None
+    if arm is None or arm.constraints or not is_static(arm.parent):
+        return None
+
+    anim = arm.animation_data
+    if (anim.action_influence != 1.0 or anim.action_blend_type != 'REPLACE' or
+            (anim.use_nla and any(not track.mute for track in anim.nla_tracks))):
+        return None
+
+    own_ids = {arm, arm.data}
+    drivers = [fcurve for adt in (anim, arm.data.animation_data) if adt is not None for fcurve in adt.drivers]
+    for fcurve in drivers:
+        for var in fcurve.driver.variables:
+            if any(target.id is not None and target.id not in own_ids for target in var.targets):
+                return None
+    if drivers and any(frame != int(frame) for frame in frames):
+        return None  # Drivers may use current frame, whose subframe cannot be set without a whole scene update.
+    for pbo in arm.pose.bones:
+        for con in pbo.constraints:
+            for attr in ("target", "pole_target"):
+                target = getattr(con, attr, None)
+                if target is not None and target != arm:
+                    return None
+
+    # Sort action's fcurves into bulk pose bones channels, and other (object-level) properties.
+    pbones = arm.pose.bones
+    pbones_index = {pbo.name: i for i, pbo in enumerate(pbones)}
+    channels = OrderedDict()
+    for attr, size in POSE_ONLY_CHANNELS:
+        values = np.empty(len(pbones) * size, dtype=np.float32)
+        pbones.foreach_get(attr, values)
+        channels[attr] = (size, values, [])
+    props = []
+    for fcurve in anim.action.fcurves:
+        if fcurve.mute or (fcurve.group is not None and fcurve.group.mute) or not fcurve.is_valid:
+            continue
+        owner_path, _sep, attr = fcurve.data_path.rpartition(".")
+        try:
+            owner = arm.path_resolve(owner_path) if owner_path else arm
+        except ValueError:
+            continue  # Unresolved paths are ignored by Blender's evaluation as well.
+        if isinstance(owner, bpy.types.PoseBone) and owner.id_data == arm and attr in channels:
+            size, _values, fcurves = channels[attr]
+            fcurves.append((pbones_index[owner.name] * size + fcurve.array_index, fcurve))
+        elif ((owner == arm or isinstance(owner, bpy.types.PoseBone)) and attr in owner.bl_rna.properties and
+              owner.bl_rna.properties[attr].type == 'FLOAT'):
+            props.append((owner, attr, fcurve))
+        else:
+            return None
+    channels = [(attr, values, fcurves) for attr, (_size, values, fcurves) in channels.items() if fcurves]
+
+    def frame_set(frame):
+        scene.frame_current = int(frame)  # Only for drivers using current frame, this does not update anything.
+        for attr, values, fcurves in channels:
+            for index, fcurve in fcurves:
+                values[index] = fcurve.evaluate(frame)
+            pbones.foreach_set(attr, values)
+        for owner, attr, fcurve in props:
+            value = getattr(owner, attr)
+            if hasattr(value, "__setitem__"):
+                value[fcurve.array_index] = fcurve.evaluate(frame)
+            else:
+                setattr(owner, attr, fcurve.evaluate(frame))
+        # Bulk writes do not tag anything, only our armature (and what depends on it) is re-evaluated.
+        arm.update_tag(refresh={'OBJECT', 'DATA'})
+        scene.update()
+
+    return frame_set
+
+
+def fbx_fcurve_evaluate(fcurve, frames):
+    """
+    Return the values of fcurve at given frames (a float64 array), as fcurve.evaluate() would, computed in bulk for
+    keyframes with constant, linear or bezier interpolation and properly ordered handles, and without modifiers.
+    Other curves are evaluated frame by frame.
+    """
+    points = fcurve.keyframe_points
+    nbr_points = len(points)
+    interps = [kp.interpolation for kp in points]
+    co, left, right = (np.empty(nbr_points * 2, dtype=np.float32) for _i in range(3))
+    points.foreach_get("co", co)
+    points.foreach_get("handle_left", left)
+    points.foreach_get("handle_right", right)
+    (xs, ys), (lxs, lys), (rxs, rys) = (a.astype(np.float64).reshape(-1, 2).T for a in (co, left, right))
+
+    extrapolated = (frames < xs[0]) | (frames > xs[-1]) if nbr_points else None
+    if (not nbr_points or any(not mod.mute for mod in fcurve.modifiers) or
+            not set(interps[:-1]) <= {'CONSTANT', 'LINEAR', 'BEZIER'} or
+            (lxs > xs).any() or (rxs < xs).any() or
+            (fcurve.extrapolation == 'LINEAR' and extrapolated.any() and
+             not {interps[0], interps[-1]} <= {'LINEAR', 'BEZIER'})):
+        return np.fromiter((fcurve.evaluate(frame) for frame in frames), dtype=np.float64, count=len(frames))
+
+    values = np.empty(len(frames), dtype=np.float64)
+    if nbr_points > 1:
+        # Segment (index of its first keyframe) of each frame.
+        seg = np.clip(np.searchsorted(xs, frames, side='right') - 1, 0, nbr_points - 2)
+        x1, y1, x4, y4 = xs[seg], ys[seg], xs[seg + 1], ys[seg + 1]
+        seg_interps = np.array(interps, dtype=object)[seg]
+
+        fac = (frames - x1) / np.where(x4 > x1, x4 - x1, 1.0)
+        values[:] = np.where(seg_interps == 'CONSTANT', y1, y1 + fac * (y4 - y1))
+
+        bezier = seg_interps == 'BEZIER'
+        if bezier.any():
+            # Same as Blender's correct_bezpart(), then solving x(t) = frame (x being monotonic) by bisection.
+            x1, y1, x4, y4, frame = x1[bezier], y1[bezier], x4[bezier], y4[bezier], frames[bezier]
+            x2, y2, x3, y3 = rxs[seg[bezier]], rys[seg[bezier]], lxs[seg[bezier] + 1], lys[seg[bezier] + 1]
+            len1, len2 = x2 - x1, x4 - x3
+            fac = np.where(len1 + len2 > x4 - x1, (x4 - x1) / np.where(len1 + len2 > 0.0, len1 + len2, 1.0), 1.0)
+            x2, y2 = x1 + fac * (x2 - x1), y1 + fac * (y2 - y1)
+            x3, y3 = x4 + fac * (x3 - x4), y4 + fac * (y3 - y4)
+
+            def bezier_coefs(v1, v2, v3, v4):
+                return v1, 3.0 * (v2 - v1), 3.0 * (v1 - 2.0 * v2 + v3), v4 - v1 + 3.0 * (v2 - v3)
+
+            cx0, cx1, cx2, cx3 = bezier_coefs(x1, x2, x3, x4)
+            t_min, t_max = np.zeros(len(frame)), np.ones(len(frame))
+            for _i in range(48):
+                t = (t_min + t_max) * 0.5
+                below = cx0 + t * (cx1 + t * (cx2 + t * cx3)) < frame
+                t_min = np.where(below, t, t_min)
+                t_max = np.where(below, t_max, t)
+            t = (t_min + t_max) * 0.5
+            cy0, cy1, cy2, cy3 = bezier_coefs(y1, y2, y3, y4)
+            values[bezier] = cy0 + t * (cy1 + t * (cy2 + t * cy3))
+
+    # Before first and after last keyframes.
+    for outside, idx, handle_xs, handle_ys, near_idx in ((frames <= xs[0], 0, lxs, lys, 1),
+                                                         (frames >= xs[-1], -1, rxs, rys, -2)):
+        if not outside.any():
+            continue
+        values[outside] = ys[idx]
+        if fcurve.extrapolation != 'LINEAR':
+            continue
+        if interps[idx] == 'LINEAR':
+            # Slope towards the next (or previous) keyframe, rather than the handle.
+            if nbr_points == 1:
+                continue
+            handle_x, handle_y = xs[near_idx], ys[near_idx]
+        else:
+            handle_x, handle_y = handle_xs[idx], handle_ys[idx]
+        if handle_x != xs[idx]:
+            values[outside] += (frames[outside] - xs[idx]) * (handle_y - ys[idx]) / (handle_x - xs[idx])
+    return values
+
+
+def np_quaternion_matrices(quats):
+    """
+    Return the (n x 3 x 3) rotation matrices of given (n x 4) (w, x, y, z) quaternions, normalized as Blender does
+    (null ones being identity).
+    """
+    length = np.sqrt((quats * quats).sum(axis=1))
+    quats = np.where(length[:, None] > 0.0, quats / np.where(length > 0.0, length, 1.0)[:, None], (1.0, 0.0, 0.0, 0.0))
+    w, x, y, z = quats.T
+    return np.stack((1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y),
+                     2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x),
+                     2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)),
+                    axis=1).reshape(-1, 3, 3)
+
+
+def np_rotation_matrices(rotation_mode, rotations):
+    """
+    Return the (n x 3 x 3) rotation matrices of given (n x 3 or 4) pose bone rotations, in given rotation mode.
+    """
+    if rotation_mode == 'QUATERNION':
+        return np_quaternion_matrices(rotations)
+    if rotation_mode == 'AXIS_ANGLE':
+        angle, axis = rotations[:, 0], rotations[:, 1:4]
+        length = np.sqrt((axis * axis).sum(axis=1))
+        sin = np.where(length > 0.0, np.sin(angle * 0.5) / np.where(length > 0.0, length, 1.0), 0.0)
+        return np_quaternion_matrices(np.column_stack((np.where(length > 0.0, np.cos(angle * 0.5), 1.0),
+                                                       axis * sin[:, None])))
+    # Euler, first axis of rotation_mode being applied first.
+    matrices = np.broadcast_to(np.identity(3), (len(rotations), 3, 3))
+    for axis in rotation_mode:
+        idx = "XYZ".index(axis)
+        i, j = (idx + 1) % 3, (idx + 2) % 3
+        cos, sin = np.cos(rotations[:, idx]), np.sin(rotations[:, idx])
+        axis_matrices = np.zeros((len(rotations), 3, 3))
+        axis_matrices[:, idx, idx] = 1.0
+        axis_matrices[:, i, i] = axis_matrices[:, j, j] = cos
+        axis_matrices[:, i, j] = -sin
+        axis_matrices[:, j, i] = sin
+        matrices = np.matmul(axis_matrices, matrices)
+    return matrices
+
+
+def np_inverted_safe(matrices):
+    """
+    Same as Matrix.inverted_safe() for a stack of (n x 4 x 4) matrices.
+    """
+    try:
+        return np.linalg.inv(matrices)
+    except np.linalg.LinAlgError:
+        return np.array([np.array(Matrix(matrix).inverted_safe(), dtype=np.float64) for matrix in matrices.tolist()])
+
+
+def np_matrices_decompose(matrices):
+    """
+    Same as Matrix.decompose() for a stack of (n x 4 x 4) matrices, returning (n x 3) locations, (n x 4) (w, x, y, z)
+    quaternions and (n x 3) scales.
+    """
+    loc = matrices[:, :3, 3]
+    scale = np.sqrt((matrices[:, :3, :3] ** 2).sum(axis=1))
+    rot = matrices[:, :3, :3] / np.where(scale > 0.0, scale, 1.0)[:, None, :]
+    negative = np.linalg.det(rot) < 0.0
+    rot[negative] *= -1.0
+    scale[negative] *= -1.0
+
+    # Same as Blender's mat3_normalized_to_quat(), branch by branch.
+    r = rot
+    quats = np.empty((len(matrices), 4), dtype=np.float64)
+    trace = 0.25 * (1.0 + r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2])
+    branches = (
+        (trace > 1e-4, 0, 4.0 * trace,
+         (None, r[:, 2, 1] - r[:, 1, 2], r[:, 0, 2] - r[:, 2, 0], r[:, 1, 0] - r[:, 0, 1])),
+        ((r[:, 0, 0] > r[:, 1, 1]) & (r[:, 0, 0] > r[:, 2, 2]), 1, 1.0 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2],
+         (r[:, 2, 1] - r[:, 1, 2], None, r[:, 0, 1] + r[:, 1, 0], r[:, 0, 2] + r[:, 2, 0])),
+        (r[:, 1, 1] > r[:, 2, 2], 2, 1.0 + r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2],
+         (r[:, 0, 2] - r[:, 2, 0], r[:, 0, 1] + r[:, 1, 0], None, r[:, 1, 2] + r[:, 2, 1])),
+        (np.ones(len(matrices), dtype=np.bool_), 3, 1.0 + r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1],
+         (r[:, 1, 0] - r[:, 0, 1], r[:, 0, 2] + r[:, 2, 0], r[:, 1, 2] + r[:, 2, 1], None)),
+    )
+    todo = np.ones(len(matrices), dtype=np.bool_)
+    for cond, main_idx, square, others in branches:
+        sel = todo & cond
+        todo &= ~cond
+        if not sel.any():
+            continue
+        # 2 * s in trace branch, s otherwise (s being Blender's one).
+        s = 2.0 * np.sqrt(np.maximum(square[sel], 0.0))
+        quats[sel, main_idx] = 0.25 * s
+        for idx, other in enumerate(others):
+            if other is not None:
+                quats[sel, idx] = other[sel] / np.where(s > 0.0, s, 1.0)
+    return loc, quats, scale
+
+
+def np_euler_compatible(eulers, old_eulers):
+    """
+    Same as Blender's compatible_eul() for (... x 3) eulers and reference ones.
+    """
+    pi_thresh = 5.1
+    pi_x2 = 2.0 * math.pi
+    deul = eulers - old_eulers
+    eulers = np.where(deul > pi_thresh, eulers - np.floor(deul / pi_x2 + 0.5) * pi_x2, eulers)
+    eulers = np.where(deul < -pi_thresh, eulers + np.floor(-deul / pi_x2 + 0.5) * pi_x2, eulers)
+    deul = eulers - old_eulers
+    abs_deul = np.abs(deul)
+    # One axis rotation larger than 180 degrees and the other ones small.
+    for i, j, k in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+        flip = (abs_deul[..., i] > 3.2) & (abs_deul[..., j] < 1.6) & (abs_deul[..., k] < 1.6)
+        eulers[..., i] -= np.where(flip, np.sign(deul[..., i]) * pi_x2, 0.0)
+    return eulers
+
+
+def np_quaternions_to_euler(quats, p_rots):
+    """
+    Return the XYZ eulers of (frames x n x 4) quaternions, as a (frames x n x 3) array, starting from (n x 3) p_rots
+    reference eulers.
+    Same as converting each quaternion with to_euler('XYZ', compat), compat being p_rots for the first frame, and the
+    euler of previous frame for the other ones (see Blender's mat3_normalized_to_compatible_eul()).
+    Both candidate eulers of all frames are computed at once, frames are then made compatible one after the other,
+    all objects at once.
+    """
+    nbr_frames, nbr = quats.shape[:2]
+    # Both eulers matching each rotation (see Blender's mat3_normalized_to_eul2()), within [-pi, pi].
+    r = np_quaternion_matrices(quats.reshape(-1, 4))
+    cy = np.hypot(r[:, 0, 0], r[:, 1, 0])
+    regular = cy > 16.0 * np.finfo(np.float32).eps
+    eul1 = np.column_stack((np.where(regular, np.arctan2(r[:, 2, 1], r[:, 2, 2]), np.arctan2(-r[:, 1, 2], r[:, 1, 1])),
+                            np.arctan2(-r[:, 2, 0], cy),
+                            np.where(regular, np.arctan2(r[:, 1, 0], r[:, 0, 0]), 0.0)))
+    eul2 = np.where(regular[:, None],
+                    np.column_stack((np.arctan2(-r[:, 2, 1], -r[:, 2, 2]), np.arctan2(-r[:, 2, 0], -cy),
+                                     np.arctan2(-r[:, 1, 0], -r[:, 0, 0]))),
+                    eul1)
+    eul1 = eul1.reshape(nbr_frames, nbr, 3)
+    eul2 = eul2.reshape(nbr_frames, nbr, 3)
+
+    eulers = np.empty((nbr_frames, nbr, 3), dtype=np.float64)
+    compat = p_rots
+    for frame_idx in range(nbr_frames):
+        # Compatible version of both eulers, and the closest one to previous frame.
+        eul12 = np_euler_compatible(np.stack((eul1[frame_idx], eul2[frame_idx])), compat)
+        dists = np.abs(eul12 - compat).sum(axis=2)
+        compat = eulers[frame_idx] = np.where((dists[0] > dists[1])[:, None], eul12[1], eul12[0])
+    return eulers
+
+
+def np_matrices_values(matrices, p_rots):
+    """
+    Return the baked values (loc, rot in radians, scale) of (frames x n x 4 x 4) transform matrices, as a
+    (frames x n x 9) array, eulers being compatible from a frame to the next, starting from (n x 3) p_rots (see
+    np_quaternions_to_euler).
+    """
+    nbr_frames, nbr = matrices.shape[:2]
+    if not matrices.size:
+        return np.empty((nbr_frames, nbr, 9), dtype=np.float64)
+    loc, quats, scale = np_matrices_decompose(matrices.reshape(-1, 4, 4))
+    rot = np_quaternions_to_euler(quats.reshape(nbr_frames, nbr, 4), p_rots)
+    return np.concatenate((loc.reshape(nbr_frames, nbr, 3), rot, scale.reshape(nbr_frames, nbr, 3)), axis=2)
+
+
+def fbx_animations_analytic(scene_data, animdata_ob, animdata_shapes, frames, p_rots):
+    """
+    Return the baked values (loc, rot in radians, scale) of animdata_ob objects for given frames, as a mapping of
+    objects to (frames x 9) arrays computed straight from the action's fcurves of their single animated armature,
+    without any frame_set() or scene update (see fbx_fcurve_evaluate), or None when anything else is animated, or when
+    that armature is constrained, driven, NLA-blended, parented to anything animated, or has bones not fully
+    inheriting their parent transform.
+    p_rots are the reference rotations (see fbx_object_tx()) of the objects, to which baked eulers are made compatible.
+    """
+    if animdata_shapes:
+        return None
+
+    arm = None
+    for ob_obj in animdata_ob:
+        if ob_obj.is_bone:
+            continue
+        if not ob_obj.is_object:
+            return None
+        ob = ob_obj.bdata
+        if ob.type == 'ARMATURE' and ob.animation_data is not None and ob.animation_data.action is not None:
+            if arm is not None:
+                return None
+            arm = ob
+    if arm is None or arm.constraints or not fbx_object_is_static(arm.parent) or arm.data.pose_position != 'POSE':
+        return None
+
+    for ob_obj in animdata_ob:
+        if ob_obj.is_bone or ob_obj.bdata == arm:
+            continue
+        ob = ob_obj.bdata
+        if not fbx_object_is_static(ob) or ob.data == arm.data:
+            return None
+        par = ob.parent
+        while par is not None:
+            if par == arm:
+                return None  # Moved by the armature (or its bones).
+            par = par.parent
+        if ob.type == 'ARMATURE' and any(pbo.constraints for pbo in ob.pose.bones):
+            return None
+
+    anim = arm.animation_data
+    if (anim.action_influence != 1.0 or anim.action_blend_type != 'REPLACE' or
+            (anim.use_nla and any(not track.mute for track in anim.nla_tracks)) or anim.drivers or
+            (arm.data.animation_data is not None and
+             (arm.data.animation_data.action or arm.data.animation_data.drivers))):
+        return None
+    pbones = arm.pose.bones
+    if any(not con.mute for pbo in pbones for con in pbo.constraints):
+        return None
+    if any(not (bo.use_inherit_rotation and bo.use_inherit_scale and bo.use_local_location) for bo in arm.data.bones):
+        return None
+
+    # Current pose bones channels, (bones x items x frames), keyed ones being evaluated from their fcurves.
+    pbones_index = {pbo.name: i for i, pbo in enumerate(pbones)}
+    channels = {}
+    for attr, size in POSE_ONLY_CHANNELS:
+        values = np.empty(len(pbones) * size, dtype=np.float32)
+        pbones.foreach_get(attr, values)
+        channels[attr] = np.repeat(values.astype(np.float64).reshape(-1, size, 1), len(frames), axis=2)
+    for fcurve in anim.action.fcurves:
+        if fcurve.mute or (fcurve.group is not None and fcurve.group.mute) or not fcurve.is_valid:
+            continue
+        owner_path, _sep, attr = fcurve.data_path.rpartition(".")
+        try:
+            owner = arm.path_resolve(owner_path) if owner_path else arm
+        except ValueError:
+            continue  # Unresolved paths are ignored by Blender's evaluation as well.
+        if not (isinstance(owner, bpy.types.PoseBone) and owner.id_data == arm and attr in channels):
+            return None
+        channels[attr][pbones_index[owner.name], fcurve.array_index] = fbx_fcurve_evaluate(fcurve, frames)
+
+    # Pose matrices (armature space) of all bones, parents first, as Blender computes them without constraints:
+    # parent pose, times bone rest relative to parent rest, times (location x rotation x scale) basis, the location of
+    # connected bones being ignored.
+    pose_matrices = {}
+    for bo in sorted(arm.data.bones, key=lambda bo: len(bo.parent_recursive)):
+        idx = pbones_index[bo.name]
+        pbo = pbones[idx]
+        matrices = np.zeros((len(frames), 4, 4))
+        rotation_mode = pbo.rotation_mode
+        rotations = channels[{'QUATERNION': "rotation_quaternion", 'AXIS_ANGLE': "rotation_axis_angle"}
+                             .get(rotation_mode, "rotation_euler")][idx].T
+        matrices[:, :3, :3] = np_rotation_matrices(rotation_mode, rotations) * channels["scale"][idx].T[:, None, :]
+        if not bo.use_connect:
+            # Location of connected bones is ignored (see BKE_pchan_to_mat4()).
+            matrices[:, :3, 3] = channels["location"][idx].T
+        matrices[:, 3, 3] = 1.0
+        rest_matrix = np.array(bo.matrix_local, dtype=np.float64)
+        if bo.parent is None:
+            pose_matrices[bo.name] = np.matmul(rest_matrix, matrices)
+        else:
+            rest_matrix = np.matmul(np.array(bo.parent.matrix_local.inverted_safe(), dtype=np.float64), rest_matrix)
+            pose_matrices[bo.name] = np.matmul(pose_matrices[bo.parent.name], np.matmul(rest_matrix, matrices))
+
+    settings = scene_data.settings
+    correction = (np.array(settings.bone_correction_matrix, dtype=np.float64)
+                  if settings.bone_correction_matrix else None)
+    correction_inv = (np.array(settings.bone_correction_matrix_inv, dtype=np.float64)
+                      if settings.bone_correction_matrix_inv else None)
+
+    values = OrderedDict()
+    bones = []
+    bones_matrices = []
+    for ob_obj in animdata_ob:
+        ob_values = values[ob_obj] = np.empty((len(frames), 9), dtype=np.float64)
+        if not (ob_obj.is_bone and ob_obj.bdata.id_data == arm.data):
+            # Static, same values on all frames.
+            loc, rot, scale, _m, _mr = fbx_object_tx(scene_data, ob_obj, rot_euler_compat=p_rots[ob_obj])
+            ob_values[:] = tuple(chain(loc, rot, scale))
+            continue
+        # Same local matrix as fbx_object_tx() (see ObjectWrapper.fbx_object_matrix()).
+        matrices = pose_matrices[ob_obj.bdata.name]
+        parent = fbx_object_parent(settings, ob_obj)
+        if parent is not None and parent.is_bone:
+            matrices = np.matmul(np_inverted_safe(pose_matrices[parent.bdata.name]), matrices)
+            if correction_inv is not None:
+                matrices = np.matmul(correction_inv, matrices)
+        if correction is not None:
+            matrices = np.matmul(matrices, correction)
+        bones.append(ob_obj)
+        bones_matrices.append(matrices)
+
+    if bones:
+        bones_values = np_matrices_values(np.stack(bones_matrices, axis=1),
+                                          np.array([tuple(p_rots[bo_obj]) for bo_obj in bones], dtype=np.float64))
+        for bo_idx, bo_obj in enumerate(bones):
+            values[bo_obj][:] = bones_values[:, bo_idx]
+    return values
+
+
+def fbx_animations_bones_tx(scene_data, animdata_ob):
+    """
+    Return the bones of animdata_ob, and a function computing their transform matrices at current frame all at once
+    (as a (bones x 4 x 4) array), or None if there is no bone.
+    Pose matrices of each armature are read in one go, parents ones being inverted once for all their children, and
+    bones matrices are brought into their FBX parent space (same as fbx_object_matrix()) as stacked 4x4 matrices.
+    """
+    settings = scene_data.settings
+    correction = (np.array(settings.bone_correction_matrix, dtype=np.float64)
+                  if settings.bone_correction_matrix else None)
+    correction_inv = (np.array(settings.bone_correction_matrix_inv, dtype=np.float64)
+                      if settings.bone_correction_matrix_inv else None)
+
+    bones = []
+    armatures = []
+    for ob_obj in animdata_ob:
+        if not (ob_obj.is_object and ob_obj.type == 'ARMATURE'):
+            continue
+        arm_bones = [bo_obj for bo_obj in ob_obj.bones if bo_obj in animdata_ob]
+        if not arm_bones:
+            continue
+        pbones = ob_obj.bdata.pose.bones
+        pbones_index = {pbo.name: i for i, pbo in enumerate(pbones)}
+        bones_idx = np.array([pbones_index[bo_obj.bdata.name] for bo_obj in arm_bones], dtype=np.int64)
+        parents = [fbx_object_parent(settings, bo_obj) for bo_obj in arm_bones]
+        parents_idx = np.array([pbones_index[parent.bdata.name] if parent.is_bone else -1 for parent in parents],
+                               dtype=np.int64)
+        armatures.append((pbones, bones_idx, parents_idx >= 0, parents_idx[parents_idx >= 0]))
+        bones.extend(arm_bones)
+    if not bones:
+        return None
+
+    def bones_tx():
+        matrices = []
+        for pbones, bones_idx, has_parent, parents_idx in armatures:
+            # PoseBone.matrix is in armature space, and column-major.
+            pose = np.empty(len(pbones) * 16, dtype=np.float32)
+            pbones.foreach_get("matrix", pose)
+            pose = pose.astype(np.float64).reshape(-1, 4, 4).transpose(0, 2, 1)
+            local = pose[bones_idx]
+            if len(parents_idx):
+                # Each parent is only inverted once, however many children it has.
+                parents = np.unique(parents_idx)
+                parents_inv = np_inverted_safe(pose[parents])[np.searchsorted(parents, parents_idx)]
+                local[has_parent] = np.matmul(parents_inv, local[has_parent])
+                if correction_inv is not None:
+                    local[has_parent] = np.matmul(correction_inv, local[has_parent])
+            matrices.append(local)
+        matrices = np.concatenate(matrices)
+        if correction is not None:
+            matrices = np.matmul(matrices, correction)
+        return matrices
+
+    return bones, bones_tx
+
+
+def fbx_animations_do_steps(scene_data, ref_id, f_start, f_end, start_zero, objects=None, force_keep=False,
+                            cache_key=None):
     """
     Generate animation data (a single AnimStack) from objects, for a given frame range.
+    Export steps generator (see fbx_run_steps()), yielding a FBXExportProgress after each baked frame. If closed
+    before its end, current frame is still restored.
+    With bake_anim_pose_only setting, a single animated armature is baked without whole scene updates when possible
+    (see fbx_animations_pose_only), and with bake_anim_analytic setting, without evaluating the scene at all (see
+    fbx_animations_analytic).
+    If cache_key is given, baked values are looked up in (or stored into) fbx_bake_cache, the key being completed
+    with the frame range and bake step.
     """
     bake_step = scene_data.settings.bake_anim_step
     simplify_fac = scene_data.settings.bake_anim_simplify_factor
@@ -1884,8 +2802,8 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     for ob_obj in objects:
         if ob_obj.parented_to_armature:
             continue
-        ACNW = AnimationCurveNodeWrapper
-        loc, rot, scale, _m, _mr = ob_obj.fbx_object_tx(scene_data)
+        ACNW = AnimationCurveNodeArrays
+        loc, rot, scale, _m, _mr = fbx_object_tx(scene_data, ob_obj)
         rot_deg = tuple(convert_rad_to_deg_iter(rot))
         force_key = (simplify_fac == 0.0) or (ob_obj.is_bone and force_keying)
         animdata_ob[ob_obj] = (ACNW(ob_obj.key, 'LCL_TRANSLATION', force_key, force_sek, loc),
@@ -1900,41 +2818,146 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
         if not me.shape_keys.use_relative:
             continue
         for shape, (channel_key, geom_key, _shape_verts_co, _shape_verts_idx) in shapes.items():
-            acnode = AnimationCurveNodeWrapper(channel_key, 'SHAPE_KEY', force_key, force_sek, (0.0,))
+            acnode = AnimationCurveNodeArrays(channel_key, 'SHAPE_KEY', force_key, force_sek, (0.0,))
             # Sooooo happy to have to twist again like a mad snake... Yes, we need to write those curves twice. :/
             acnode.add_group(me_key, shape.name, shape.name, (shape.name,))
             animdata_shapes[channel_key] = (acnode, me, shape)
 
-    currframe = f_start
-    while currframe <= f_end:
-        real_currframe = currframe - f_start if start_zero else currframe
-        scene.frame_set(int(currframe), currframe - int(currframe))
-
-        for ob_obj in animdata_ob:
-            ob_obj.dupli_list_create(scene, 'RENDER')
-        for ob_obj, (anim_loc, anim_rot, anim_scale) in animdata_ob.items():
-            # We compute baked loc/rot/scale for all objects (rot being euler-compat with previous value!).
-            p_rot = p_rots.get(ob_obj, None)
-            loc, rot, scale, _m, _mr = ob_obj.fbx_object_tx(scene_data, rot_euler_compat=p_rot)
-            p_rots[ob_obj] = rot
-            anim_loc.add_keyframe(real_currframe, loc)
-            anim_rot.add_keyframe(real_currframe, tuple(convert_rad_to_deg_iter(rot)))
-            anim_scale.add_keyframe(real_currframe, scale)
-        for ob_obj in objects:
-            ob_obj.dupli_list_clear()
-        for anim_shape, me, shape in animdata_shapes.values():
-            anim_shape.add_keyframe(real_currframe, (shape.value * 100.0,))
-        currframe += bake_step
+    cached = None
+    if cache_key is not None:
+        cache_key = (cache_key, f_start, f_end, bake_step, start_zero)
+        cached = fbx_bake_cache.get(cache_key)
+        if cached is not None:
+            _frames, values = cached
+            if not (all(ob_obj.key in values for ob_obj in animdata_ob) and
+                    all(channel_key in values for channel_key in animdata_shapes)):
+                cached = None
+
+    if cached is not None:
+        # Bake skipped, just reuse cached values.
+        frames, values = cached
+    else:
+        bake_frames = []
+        currframe = f_start
+        while currframe <= f_end:
+            bake_frames.append(currframe)
+            currframe += bake_step
+        frames = np.array(bake_frames, dtype=np.float64)
+        if start_zero:
+            frames -= f_start
+        # Baked values of each object (loc, rot in degrees, scale), and of each shape key channel, for all frames.
+        values = OrderedDict(chain(((ob_obj.key, np.empty((len(frames), 9), dtype=np.float64))
+                                    for ob_obj in animdata_ob),
+                                   ((channel_key, np.empty(len(frames), dtype=np.float64))
+                                    for channel_key in animdata_shapes)))
+        values_ob = tuple((ob_obj, values[ob_obj.key]) for ob_obj in animdata_ob)
+        values_shapes = tuple((shape, values[channel_key])
+                              for channel_key, (_anim, _me, shape) in animdata_shapes.items())
+
+        analytic = None
+        if scene_data.settings.bake_anim_analytic:
+            analytic = fbx_animations_analytic(scene_data, animdata_ob, animdata_shapes,
+                                               np.array(bake_frames, dtype=np.float64), p_rots)
+
+        if analytic is not None and scene_data.settings.bake_anim_analytic != 'CHECK':
+            for ob_obj, ob_values in values_ob:
+                ob_values[:] = analytic[ob_obj]
+            yield FBXExportProgress(len(bake_frames), len(bake_frames))
+        else:
+            frame_set = None
+            if scene_data.settings.bake_anim_pose_only:
+                frame_set = fbx_animations_pose_only(scene, animdata_ob, animdata_shapes, bake_frames)
+            if frame_set is None:
+                def frame_set(frame):
+                    scene.frame_set(int(frame), frame - int(frame))
+
+            # Only transform matrices are gathered for each frame, bones being all computed at once (see
+            # fbx_animations_bones_tx), and other objects one by one. They are all decomposed after the bake, all
+            # objects at once (see np_matrices_values).
+            bones_tx = fbx_animations_bones_tx(scene_data, animdata_ob)
+            bones, bones_tx = bones_tx if bones_tx is not None else ((), None)
+            bones_set = set(bones)
+            singles = tuple(ob_obj for ob_obj in animdata_ob if ob_obj not in bones_set)
+            matrices = np.empty((len(bake_frames), len(singles) + len(bones), 4, 4), dtype=np.float64)
+
+            try:
+                for frame_idx, currframe in enumerate(bake_frames):
+                    frame_set(currframe)
+
+                    for ob_obj in animdata_ob:
+                        ob_obj.dupli_list_create(scene, 'RENDER')
+                    for ob_idx, ob_obj in enumerate(singles):
+                        matrices[frame_idx, ob_idx] = fbx_object_matrix(scene_data, ob_obj)
+                    if bones_tx is not None:
+                        matrices[frame_idx, len(singles):] = bones_tx()
+                    for ob_obj in objects:
+                        ob_obj.dupli_list_clear()
+                    for shape, shape_values in values_shapes:
+                        shape_values[frame_idx] = shape.value * 100.0
+
+                    yield FBXExportProgress(frame_idx + 1, len(bake_frames))
+            finally:
+                scene.frame_set(back_currframe, 0.0)
+
+            baked_obs = singles + tuple(bones)
+            baked_values = np_matrices_values(matrices, np.array([tuple(p_rots[ob_obj]) for ob_obj in baked_obs],
+                                                                 dtype=np.float64).reshape(-1, 3))
+            for ob_idx, ob_obj in enumerate(baked_obs):
+                values[ob_obj.key][:] = baked_values[:, ob_idx]
+
+            if analytic is not None:
+                # Cross-check of both bakes, largest differences of locations, rotations (degrees) and scales.
+                diffs = np.zeros(9)
+                for ob_obj, ob_values in values_ob:
+                    if len(ob_values):
+                        diffs = np.maximum(diffs, np.abs(ob_values - analytic[ob_obj]).max(axis=0))
+                scene_data.settings.report({'INFO'}, "Analytic bake check: largest differences of %.6g (location), "
+                                                     "%.6g° (rotation), %.6g (scale)"
+                                           % (diffs[0:3].max(), convert_rad_to_deg(diffs[3:6].max()),
+                                              diffs[6:9].max()))
+
+        for _ob_obj, ob_values in values_ob:
+            ob_values[:, 3:6] = convert_rad_to_deg(ob_values[:, 3:6])
+
+        if cache_key is not None:
+            fbx_bake_cache.set(cache_key, frames, values)
 
-    scene.frame_set(back_currframe, 0.0)
+    for ob_obj, anims in animdata_ob.items():
+        ob_values = values[ob_obj.key]
+        for anim, anim_values in zip(anims, (ob_values[:, 0:3], ob_values[:, 3:6], ob_values[:, 6:9])):
+            anim.set_keyframes(frames, anim_values)
+    for channel_key, (anim_shape, me, shape) in animdata_shapes.items():
+        anim_shape.set_keyframes(frames, values[channel_key][:, None])
 
     animations = OrderedDict()
 
+    simplify_error = scene_data.settings.bake_anim_simplify_error
+    if simplify_error is not None:
+        # Location of root objects is in FBX units (see fbx_object_tx).
+        loc_error, rot_error, scale_error, shape_error = simplify_error
+        root_loc_error = loc_error * scene_data.settings.global_scale
+        nbr_kept = nbr_baked = 0
+
+        def simplify(anim, max_errors):
+            nonlocal nbr_kept, nbr_baked
+            kept, baked = anim.simplify_error(max_errors)
+            nbr_kept += kept
+            nbr_baked += baked
+    else:
+        def simplify(anim, max_errors):
+            anim.simplify(simplify_fac, bake_step, force_keep)
+
     # And now, produce final data (usable by FBX export code)
     # Objects-like loc/rot/scale...
     for ob_obj, anims in animdata_ob.items():
-        for anim in anims:
-            anim.simplify(simplify_fac, bake_step, force_keep)
+        if simplify_error is not None:
+            ob_loc_error = (loc_error if fbx_object_parent(scene_data.settings, ob_obj) in scene_data.objects
+                            else root_loc_error)
+            anims_errors = ((ob_loc_error,) * 3, (rot_error,) * 3, (scale_error,) * 3)
+        else:
+            anims_errors = (None, None, None)
+        for anim, max_errors in zip(anims, anims_errors):
+            simplify(anim, max_errors)
             if not anim:
                 continue
             for obj_key, group_key, group, fbx_group, fbx_gname in anim.get_final_data(scene, ref_id, force_keep):
@@ -1946,7 +2969,7 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     # And meshes' shape keys.
     for channel_key, (anim_shape, me, shape) in animdata_shapes.items():
         final_keys = OrderedDict()
-        anim_shape.simplify(simplify_fac, bake_step, force_keep)
+        simplify(anim_shape, (shape_error,) if simplify_error is not None else None)
         if not anim_shape:
             continue
         for elem_key, group_key, group, fbx_group, fbx_gname in anim_shape.get_final_data(scene, ref_id, force_keep):
@@ -1959,6 +2982,10 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     alayer_key = get_blender_anim_layer_key(scene, ref_id)
     name = (get_blenderID_name(ref_id) if ref_id else scene.name).encode()
 
+    if simplify_error is not None and nbr_baked:
+        scene_data.settings.report({'INFO'}, "%s simplified: %d of %d keys kept (%.1f%%)"
+                                   % (name.decode(), nbr_kept, nbr_baked, 100.0 * nbr_kept / nbr_baked))
+
     if start_zero:
         f_end -= f_start
         f_start = 0.0
@@ -1966,9 +2993,19 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     return (astack_key, animations, alayer_key, name, f_start, f_end) if animations else None
 
 
-def fbx_animations(scene_data):
+def fbx_animations_do(*args, **kwargs):
+    """
+    Same as fbx_animations_do_steps(), run to its end.
+    """
+    return fbx_run_steps(fbx_animations_do_steps(*args, **kwargs))
+
+
+def fbx_animations_steps(scene_data, bake_cache_key=None):
     """
     Generate global animation data from objects.
+    bake_cache_key, if given, is used to cache the bake of the global animstack (see fbx_animations_do).
+    Export steps generator (see fbx_run_steps()), only the bake of the global animstack yielding progress (NLA
+    strips and all actions animstacks are baked at once, as objects are modified meanwhile).
     """
     scene = scene_data.scene
     animations = []
@@ -2107,7 +3144,9 @@ def fbx_animations(scene_data):
 
     # Global (containing everything) animstack, only if not exporting NLA strips and/or all actions.
     if not scene_data.settings.bake_anim_use_nla_strips and not scene_data.settings.bake_anim_use_all_actions:
-        add_anim(animations, animated, fbx_animations_do(scene_data, None, scene.frame_start, scene.frame_end, False))
+        anim = yield from fbx_animations_do_steps(scene_data, None, scene.frame_start, scene.frame_end, False,
+                                                  cache_key=bake_cache_key)
+        add_anim(animations, animated, anim)
 
     # Be sure to update all matrices back to org state!
     scene.frame_set(scene.frame_current, 0.0)
@@ -2115,18 +3154,76 @@ def fbx_animations(scene_data):
     return animations, animated, frame_start, frame_end
 
 
-def fbx_data_from_scene(scene, settings):
+def fbx_animations(scene_data, bake_cache_key=None):
+    """
+    Same as fbx_animations_steps(), run to its end.
+    """
+    return fbx_run_steps(fbx_animations_steps(scene_data, bake_cache_key))
+
+
+def fbx_animations_templates(scene, settings, animations, templates):
+    """
+    Add the animation templates (stacks, layers, curve nodes and curves) matching given animations.
+    """
+    nbr_astacks = len(animations)
+    nbr_acnodes = 0
+    nbr_acurves = 0
+    for _astack_key, astack, _al, _n, _fs, _fe in animations:
+        for _alayer_key, alayer in astack.values():
+            for _acnode_key, acnode, _acnode_name in alayer.values():
+                nbr_acnodes += 1
+                for _acurve_key, _dval, acurve, acurve_valid in acnode.values():
+                    if acurve:
+                        nbr_acurves += 1
+
+    templates[b"AnimationStack"] = fbx_template_def_animstack(scene, settings, nbr_users=nbr_astacks)
+    # Would be nice to have one layer per animated object, but this seems tricky and not that well supported.
+    # So for now, only one layer per anim stack.
+    templates[b"AnimationLayer"] = fbx_template_def_animlayer(scene, settings, nbr_users=nbr_astacks)
+    templates[b"AnimationCurveNode"] = fbx_template_def_animcurvenode(scene, settings, nbr_users=nbr_acnodes)
+    templates[b"AnimationCurve"] = fbx_template_def_animcurve(scene, settings, nbr_users=nbr_acurves)
+
+
+def fbx_animations_connections(animations, connections):
+    """
+    Add the connections linking given animations to their stacks, layers and animated elements.
+    """
+    for astack_key, astack, alayer_key, _name, _fstart, _fend in animations:
+        # Animstack itself is linked nowhere!
+        astack_id = get_fbx_uuid_from_key(astack_key)
+        # For now, only one layer!
+        alayer_id = get_fbx_uuid_from_key(alayer_key)
+        connections.append((b"OO", alayer_id, astack_id, None))
+        for elem_key, (alayer_key, acurvenodes) in astack.items():
+            elem_id = get_fbx_uuid_from_key(elem_key)
+            # Animlayer -> animstack.
+            # alayer_id = get_fbx_uuid_from_key(alayer_key)
+            # connections.append((b"OO", alayer_id, astack_id, None))
+            for fbx_prop, (acurvenode_key, acurves, acurvenode_name) in acurvenodes.items():
+                # Animcurvenode -> animalayer.
+                acurvenode_id = get_fbx_uuid_from_key(acurvenode_key)
+                connections.append((b"OO", acurvenode_id, alayer_id, None))
+                # Animcurvenode -> object property.
+                connections.append((b"OP", acurvenode_id, elem_id, fbx_prop.encode()))
+                for fbx_item, (acurve_key, default_value, acurve, acurve_valid) in acurves.items():
+                    if acurve:
+                        # Animcurve -> Animcurvenode.
+                        connections.append((b"OP", get_fbx_uuid_from_key(acurve_key), acurvenode_id, fbx_item.encode()))
+
+
+def fbx_data_from_scene_steps(scene, settings, timings=None, bake_cache_key=None):
     """
     Do some pre-processing over scene's data...
+    Export steps generator (see fbx_run_steps()), yielding progress while baking animations.
     """
     objtypes = settings.object_types
     dp_objtypes = objtypes - {'ARMATURE'}  # Armatures are not supported as dupli instances currently...
-    perfmon = PerfMon()
+    perfmon = PerfMonTimings(timings)
     perfmon.level_up()
 
     # ##### Gathering data...
 
-    perfmon.step("FBX export prepare: Wrapping Objects...")
+    perfmon.step("FBX export prepare: Wrapping Objects...", "wrap_objects")
 
     # This is rather simple for now, maybe we could end generating templates with most-used values
     # instead of default ones?
@@ -2144,7 +3241,7 @@ def fbx_data_from_scene(scene, settings):
             objects[dp_obj] = None
         ob_obj.dupli_list_clear()
 
-    perfmon.step("FBX export prepare: Wrapping Data (lamps, cameras, empties)...")
+    perfmon.step("FBX export prepare: Wrapping Data (lamps, cameras, empties)...", "wrap_data")
 
     data_lamps = OrderedDict((ob_obj.bdata.data, get_blenderID_key(ob_obj.bdata.data))
                              for ob_obj in objects if ob_obj.type == 'LAMP')
@@ -2155,7 +3252,7 @@ def fbx_data_from_scene(scene, settings):
     data_empties = OrderedDict((ob_obj, get_blender_empty_key(ob_obj.bdata))
                                for ob_obj in objects if ob_obj.type == 'EMPTY')
 
-    perfmon.step("FBX export prepare: Wrapping Meshes...")
+    perfmon.step("FBX export prepare: Wrapping Meshes...", "wrap_meshes")
 
     data_meshes = OrderedDict()
     for ob_obj in objects:
@@ -2201,7 +3298,7 @@ def fbx_data_from_scene(scene, settings):
         if org_ob_obj is not None:
             data_meshes[org_ob_obj] = data_meshes[ob_obj]
 
-    perfmon.step("FBX export prepare: Wrapping ShapeKeys...")
+    perfmon.step("FBX export prepare: Wrapping ShapeKeys...", "wrap_shape_keys")
 
     # ShapeKeys.
     data_deformers_shape = OrderedDict()
@@ -2213,38 +3310,43 @@ def fbx_data_from_scene(scene, settings):
             continue
 
         shapes_key = get_blender_mesh_shape_key(me)
-        # We gather all vcos first, since some skeys may be based on others...
-        _cos = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.vertices) * 3
-        me.vertices.foreach_get("co", _cos)
-        v_cos = tuple(vcos_transformed_gen(_cos, geom_mat_co))
-        sk_cos = {}
-        for shape in me.shape_keys.key_blocks[1:]:
-            shape.data.foreach_get("co", _cos)
-            sk_cos[shape] = tuple(vcos_transformed_gen(_cos, geom_mat_co))
-        sk_base = me.shape_keys.key_blocks[0]
-
-        for shape in me.shape_keys.key_blocks[1:]:
+        # We gather all vcos first (mesh ones, then shapes ones), since some skeys may be based on others...
+        key_blocks = me.shape_keys.key_blocks
+        sk_cos = np.empty((len(key_blocks), len(me.vertices) * 3), dtype=np.float32)
+        me.vertices.foreach_get("co", sk_cos[0])
+        for sk_idx, shape in enumerate(key_blocks[1:], start=1):
+            shape.data.foreach_get("co", sk_cos[sk_idx])
+        sk_cos = sk_cos.reshape(len(key_blocks), -1, 3)
+        if geom_mat_co is not None:
+            geom_mat = np.array(geom_mat_co, dtype=np.float64)
+            sk_cos = (np.dot(sk_cos, geom_mat[:3, :3].T) + geom_mat[:3, 3]).astype(np.float32)
+        sk_idxs = {shape.name: sk_idx for sk_idx, shape in enumerate(key_blocks)}
+        sk_base = key_blocks[0]
+
+        for sk_idx, shape in enumerate(key_blocks[1:], start=1):
             # Only write vertices really different from org coordinates!
             # XXX FBX does not like empty shapes (makes Unity crash e.g.), so we have to do this here... :/
-            shape_verts_co = []
-            shape_verts_idx = []
-
-            sv_cos = sk_cos[shape]
-            ref_cos = v_cos if shape.relative_key == sk_base else sk_cos[shape.relative_key]
-            for idx, (sv_co, ref_co) in enumerate(zip(sv_cos, ref_cos)):
-                if similar_values_iter(sv_co, ref_co):
-                    # Note: Maybe this is a bit too simplistic, should we use real shape base here? Though FBX does not
-                    #       have this at all... Anyway, this should cover most common cases imho.
-                    continue
-                shape_verts_co.extend(Vector(sv_co) - Vector(ref_co))
-                shape_verts_idx.append(idx)
-            if not shape_verts_co:
+            # Note: Maybe this is a bit too simplistic, should we use real shape base here? Though FBX does not
+            #       have this at all... Anyway, this should cover most common cases imho.
+            sv_cos = sk_cos[sk_idx]
+            ref_cos = sk_cos[0 if shape.relative_key == sk_base else sk_idxs[shape.relative_key.name]]
+            # Same test as similar_values_iter(), for all vertices at once.
+            sv_cos64 = sv_cos.astype(np.float64)
+            ref_cos64 = ref_cos.astype(np.float64)
+            similar = ((sv_cos64 == ref_cos64) |
+                       (np.abs(sv_cos64 - ref_cos64) <= 1e-6 * np.maximum(np.abs(sv_cos64), np.abs(ref_cos64))))
+            shape_verts_idx = np.flatnonzero(~similar.all(axis=1))
+            del sv_cos64, ref_cos64, similar
+            if not len(shape_verts_idx):
                 continue
+            shape_verts_co = np_to_array(sv_cos[shape_verts_idx] - ref_cos[shape_verts_idx], data_types.ARRAY_FLOAT64)
+            shape_verts_idx = np_to_array(shape_verts_idx, data_types.ARRAY_INT32)
             channel_key, geom_key = get_blender_mesh_shape_channel_key(me, shape)
             data = (channel_key, geom_key, shape_verts_co, shape_verts_idx)
             data_deformers_shape.setdefault(me, (me_key, shapes_key, OrderedDict()))[2][shape] = data
+        del sk_cos
 
-    perfmon.step("FBX export prepare: Wrapping Armatures...")
+    perfmon.step("FBX export prepare: Wrapping Armatures...", "wrap_armatures")
 
     # Armatures!
     data_deformers_skin = OrderedDict()
@@ -2261,7 +3363,7 @@ def fbx_data_from_scene(scene, settings):
     if settings.add_leaf_bones:
         data_leaf_bones = fbx_generate_leaf_bones(settings, data_bones)
 
-    perfmon.step("FBX export prepare: Wrapping World...")
+    perfmon.step("FBX export prepare: Wrapping World...", "wrap_world")
 
     # Some world settings are embedded in FBX materials...
     if scene.world:
@@ -2269,7 +3371,7 @@ def fbx_data_from_scene(scene, settings):
     else:
         data_world = OrderedDict()
 
-    perfmon.step("FBX export prepare: Wrapping Materials...")
+    perfmon.step("FBX export prepare: Wrapping Materials...", "wrap_materials")
 
     # TODO: Check all the mat stuff works even when mats are linked to Objects
     #       (we can then have the same mesh used with different materials...).
@@ -2292,7 +3394,7 @@ def fbx_data_from_scene(scene, settings):
             else:
                 data_materials[mat] = (get_blenderID_key(mat), [ob_obj])
 
-    perfmon.step("FBX export prepare: Wrapping Textures...")
+    perfmon.step("FBX export prepare: Wrapping Textures...", "wrap_textures")
 
     # Note FBX textures also hold their mapping info.
     # TODO: Support layers?
@@ -2331,7 +3433,7 @@ def fbx_data_from_scene(scene, settings):
             else:
                 data_videos[img] = (get_blenderID_key(img), [tex])
 
-    perfmon.step("FBX export prepare: Wrapping Animations...")
+    perfmon.step("FBX export prepare: Wrapping Animations...", "bake_animations")
 
     # Animation...
     animations = ()
@@ -2348,11 +3450,16 @@ def fbx_data_from_scene(scene, settings):
             data_bones, data_leaf_bones, data_deformers_skin, data_deformers_shape,
             data_world, data_materials, data_textures, data_videos,
         )
-        animations, animated, frame_start, frame_end = fbx_animations(tmp_scdata)
+        try:
+            animations, animated, frame_start, frame_end = yield from fbx_animations_steps(tmp_scdata, bake_cache_key)
+        except:
+            # Failed, or cancelled (GeneratorExit) while baking, temp meshes would be leaked otherwise.
+            fbx_scene_data_cleanup(tmp_scdata)
+            raise
 
     # ##### Creation of templates...
 
-    perfmon.step("FBX export prepare: Generating templates...")
+    perfmon.step("FBX export prepare: Generating templates...", "templates")
 
     templates = OrderedDict()
     templates[b"GlobalSettings"] = fbx_template_def_globalsettings(scene, settings, nbr_users=1)
@@ -2409,29 +3516,13 @@ def fbx_data_from_scene(scene, settings):
         templates[b"Video"] = fbx_template_def_video(scene, settings, nbr_users=len(data_videos))
 
     if animations:
-        nbr_astacks = len(animations)
-        nbr_acnodes = 0
-        nbr_acurves = 0
-        for _astack_key, astack, _al, _n, _fs, _fe in animations:
-            for _alayer_key, alayer in astack.values():
-                for _acnode_key, acnode, _acnode_name in alayer.values():
-                    nbr_acnodes += 1
-                    for _acurve_key, _dval, acurve, acurve_valid in acnode.values():
-                        if acurve:
-                            nbr_acurves += 1
-
-        templates[b"AnimationStack"] = fbx_template_def_animstack(scene, settings, nbr_users=nbr_astacks)
-        # Would be nice to have one layer per animated object, but this seems tricky and not that well supported.
-        # So for now, only one layer per anim stack.
-        templates[b"AnimationLayer"] = fbx_template_def_animlayer(scene, settings, nbr_users=nbr_astacks)
-        templates[b"AnimationCurveNode"] = fbx_template_def_animcurvenode(scene, settings, nbr_users=nbr_acnodes)
-        templates[b"AnimationCurve"] = fbx_template_def_animcurve(scene, settings, nbr_users=nbr_acurves)
+        fbx_animations_templates(scene, settings, animations, templates)
 
     templates_users = sum(tmpl.nbr_users for tmpl in templates.values())
 
     # ##### Creation of connections...
 
-    perfmon.step("FBX export prepare: Generating Connections...")
+    perfmon.step("FBX export prepare: Generating Connections...", "connections")
 
     connections = []
 
@@ -2448,7 +3539,7 @@ def fbx_data_from_scene(scene, settings):
 
     # Armature & Bone chains.
     for bo_obj in data_bones.keys():
-        par_obj = bo_obj.parent
+        par_obj = fbx_object_parent(settings, bo_obj)
         if par_obj not in objects:
             continue
         connections.append((b"OO", bo_obj.fbx_uuid, par_obj.fbx_uuid, None))
@@ -2533,27 +3624,7 @@ def fbx_data_from_scene(scene, settings):
             connections.append((b"OO", get_fbx_uuid_from_key(vid_key), get_fbx_uuid_from_key(tex_key), None))
 
     # Animations
-    for astack_key, astack, alayer_key, _name, _fstart, _fend in animations:
-        # Animstack itself is linked nowhere!
-        astack_id = get_fbx_uuid_from_key(astack_key)
-        # For now, only one layer!
-        alayer_id = get_fbx_uuid_from_key(alayer_key)
-        connections.append((b"OO", alayer_id, astack_id, None))
-        for elem_key, (alayer_key, acurvenodes) in astack.items():
-            elem_id = get_fbx_uuid_from_key(elem_key)
-            # Animlayer -> animstack.
-            # alayer_id = get_fbx_uuid_from_key(alayer_key)
-            # connections.append((b"OO", alayer_id, astack_id, None))
-            for fbx_prop, (acurvenode_key, acurves, acurvenode_name) in acurvenodes.items():
-                # Animcurvenode -> animalayer.
-                acurvenode_id = get_fbx_uuid_from_key(acurvenode_key)
-                connections.append((b"OO", acurvenode_id, alayer_id, None))
-                # Animcurvenode -> object property.
-                connections.append((b"OP", acurvenode_id, elem_id, fbx_prop.encode()))
-                for fbx_item, (acurve_key, default_value, acurve, acurve_valid) in acurves.items():
-                    if acurve:
-                        # Animcurve -> Animcurvenode.
-                        connections.append((b"OP", get_fbx_uuid_from_key(acurve_key), acurvenode_id, fbx_item.encode()))
+    fbx_animations_connections(animations, connections)
 
     perfmon.level_down()
 
@@ -2568,6 +3639,13 @@ def fbx_data_from_scene(scene, settings):
     )
 
 
+def fbx_data_from_scene(scene, settings, timings=None, bake_cache_key=None):
+    """
+    Same as fbx_data_from_scene_steps(), run to its end.
+    """
+    return fbx_run_steps(fbx_data_from_scene_steps(scene, settings, timings, bake_cache_key))
+
+
 def fbx_scene_data_cleanup(scene_data):
     """
     Some final cleanup...
@@ -2757,38 +3835,50 @@ def fbx_definitions_elements(root, scene_data):
     fbx_templates_generate(definitions, scene_data.templates)
 
 
-def fbx_objects_elements(root, scene_data):
+def fbx_objects_elements(root, scene_data, timings=None, writer=None):
     """
     Data (objects, geometry, material, textures, armatures, etc.).
+    If writer (a FBXStreamWriter) is given, elements are written and freed as soon as each data item is done.
     """
-    perfmon = PerfMon()
+    perfmon = PerfMonTimings(timings)
     perfmon.level_up()
     objects = elem_empty(root, b"Objects")
 
-    perfmon.step("FBX export fetch empties (%d)..." % len(scene_data.data_empties))
+    def flush():
+        if writer is not None:
+            writer.write(objects)
+
+    if writer is not None:
+        writer.begin(objects)
+
+    perfmon.step("FBX export fetch empties (%d)..." % len(scene_data.data_empties), "elements_empties")
 
     for empty in scene_data.data_empties:
         fbx_data_empty_elements(objects, empty, scene_data)
+        flush()
 
-    perfmon.step("FBX export fetch lamps (%d)..." % len(scene_data.data_lamps))
+    perfmon.step("FBX export fetch lamps (%d)..." % len(scene_data.data_lamps), "elements_lamps")
 
     for lamp in scene_data.data_lamps:
         fbx_data_lamp_elements(objects, lamp, scene_data)
+        flush()
 
-    perfmon.step("FBX export fetch cameras (%d)..." % len(scene_data.data_cameras))
+    perfmon.step("FBX export fetch cameras (%d)..." % len(scene_data.data_cameras), "elements_cameras")
 
     for cam in scene_data.data_cameras:
         fbx_data_camera_elements(objects, cam, scene_data)
+        flush()
 
     perfmon.step("FBX export fetch meshes (%d)..."
-                 % len({me_key for me_key, _me, _free in scene_data.data_meshes.values()}))
+                 % len({me_key for me_key, _me, _free in scene_data.data_meshes.values()}), "elements_meshes")
 
     done_meshes = set()
     for me_obj in scene_data.data_meshes:
         fbx_data_mesh_elements(objects, me_obj, scene_data, done_meshes)
+        flush()
     del done_meshes
 
-    perfmon.step("FBX export fetch objects (%d)..." % len(scene_data.objects))
+    perfmon.step("FBX export fetch objects (%d)..." % len(scene_data.objects), "elements_objects")
 
     for ob_obj in scene_data.objects:
         if ob_obj.is_dupli:
@@ -2800,31 +3890,40 @@ def fbx_objects_elements(root, scene_data):
                 continue
             fbx_data_object_elements(objects, dp_obj, scene_data)
         ob_obj.dupli_list_clear()
+        flush()
 
-    perfmon.step("FBX export fetch remaining...")
+    perfmon.step("FBX export fetch remaining...", "elements_remaining")
 
     for ob_obj in scene_data.objects:
         if not (ob_obj.is_object and ob_obj.type == 'ARMATURE'):
             continue
         fbx_data_armature_elements(objects, ob_obj, scene_data)
+        flush()
 
     if scene_data.data_leaf_bones:
         fbx_data_leaf_bone_elements(objects, scene_data)
+        flush()
 
     for mat in scene_data.data_materials:
         fbx_data_material_elements(objects, mat, scene_data)
+        flush()
 
     for tex in scene_data.data_textures:
         fbx_data_texture_file_elements(objects, tex, scene_data)
+        flush()
 
     for vid in scene_data.data_videos:
         fbx_data_video_elements(objects, vid, scene_data)
+        flush()
 
-    perfmon.step("FBX export fetch animations...")
+    perfmon.step("FBX export fetch animations...", "elements_animations")
     start_time = time.process_time()
 
     fbx_data_animation_elements(objects, scene_data)
 
+    if writer is not None:
+        writer.end()
+
     perfmon.level_down()
 
 
@@ -2863,42 +3962,40 @@ def fbx_takes_elements(root, scene_data):
 
 # ##### "Main" functions. #####
 
-# This func can be called with just the filepath
-def save_single(operator, scene, filepath="",
-                global_matrix=Matrix(),
-                apply_unit_scale=False,
-                axis_up="Z",
-                axis_forward="Y",
-                context_objects=None,
-                object_types=None,
-                use_mesh_modifiers=True,
-                use_mesh_modifiers_render=True,
-                mesh_smooth_type='FACE',
-                use_armature_deform_only=False,
-                bake_anim=True,
-                bake_anim_use_all_bones=True,
-                bake_anim_use_nla_strips=True,
-                bake_anim_use_all_actions=True,
-                bake_anim_step=1.0,
-                bake_anim_simplify_factor=1.0,
-                bake_anim_force_startend_keying=True,
-                add_leaf_bones=False,
-                primary_bone_axis='Y',
-                secondary_bone_axis='X',
-                use_metadata=True,
-                path_mode='AUTO',
-                use_mesh_edges=True,
-                use_tspace=True,
-                embed_textures=False,
-                use_custom_props=False,
-                bake_space_transform=False,
-                armature_nodetype='NULL',
-                **kwargs
-                ):
-
-    # Clear cached ObjectWrappers (just in case...).
-    ObjectWrapper.cache_clear()
-
+def fbx_export_settings(operator, scene, filepath="",
+                        global_matrix=Matrix(),
+                        apply_unit_scale=False,
+                        axis_up="Z",
+                        axis_forward="Y",
+                        context_objects=None,
+                        object_types=None,
+                        use_mesh_modifiers=True,
+                        use_mesh_modifiers_render=True,
+                        mesh_smooth_type='FACE',
+                        use_armature_deform_only=False,
+                        bake_anim=True,
+                        bake_anim_use_all_bones=True,
+                        bake_anim_use_nla_strips=True,
+                        bake_anim_use_all_actions=True,
+                        bake_anim_step=1.0,
+                        bake_anim_simplify_factor=1.0,
+                        bake_anim_force_startend_keying=True,
+                        add_leaf_bones=False,
+                        primary_bone_axis='Y',
+                        secondary_bone_axis='X',
+                        use_metadata=True,
+                        path_mode='AUTO',
+                        use_mesh_edges=True,
+                        use_tspace=True,
+                        embed_textures=False,
+                        use_custom_props=False,
+                        bake_space_transform=False,
+                        armature_nodetype='NULL',
+                        **kwargs
+                        ):
+    """
+    Generate the export settings from save options (shared by all 'main' functions below).
+    """
     if object_types is None:
         object_types = {'EMPTY', 'CAMERA', 'LAMP', 'ARMATURE', 'MESH', 'OTHER'}
 
@@ -2940,7 +4037,7 @@ def save_single(operator, scene, filepath="",
         set(),  # embedded_set
     )
 
-    settings = FBXExportSettings(
+    return FBXExportSettings(
         operator.report, (axis_up, axis_forward), global_matrix, global_scale, apply_unit_scale,
         bake_space_transform, global_matrix_inv, global_matrix_inv_transposed,
         context_objects, object_types, use_mesh_modifiers, use_mesh_modifiers_render,
@@ -2950,15 +4047,374 @@ def save_single(operator, scene, filepath="",
         bake_anim, bake_anim_use_all_bones, bake_anim_use_nla_strips, bake_anim_use_all_actions,
         bake_anim_step, bake_anim_simplify_factor, bake_anim_force_startend_keying,
         False, media_settings, use_custom_props,
+        *(kwargs.get(name, default) for name, default in FBX_EXPORT_SETTINGS_EXTRA),
+        fbx_bones_pruned(kwargs.get("exclude_bones"))
     )
 
+
+class FBXCompressedArray:
+    """
+    Array property of an FBX element, compressed by a FBXArrayCompression thread.
+    Accessing its length or data waits for the compression to be done.
+    """
+    __slots__ = ("length", "future", "data")
+
+    def __init__(self, length, future):
+        self.length = length
+        self.future = future
+        self.data = None
+
+    def result(self):
+        if self.data is None:
+            data = self.future.result()
+            self.data = struct.pack('<3I', self.length, 1, len(data)) + data
+            self.future = None
+        return self.data
+
+    def __len__(self):
+        return len(self.result())
+
+
+class FBXArrayCompression:
+    """
+    Context in which array properties of the FBX elements generated by current thread (see
+    fbx_elem_data_single_array()) are zlib-compressed with given level, and, if workers is not zero, by that many
+    threads (zlib releasing the GIL), while elements generation goes on.
+    Such properties are FBXCompressedArray placeholders, written in their original place once compressed, either by
+    a FBXStreamWriter, or after being resolved by resolve() before encode_bin.write().
+    Small arrays are still compressed (or not) right away, like encode_bin does, as are all arrays outside of any such
+    context.
+    If executor is given, it is used instead of workers threads of our own, and is left running on exit (so that
+    compression can go on after it).
+    """
+    # Arrays smaller than that (in bytes) are not worth a thread.
+    threaded_min_size = 64 * 1024
+    # Compression context of each thread generating elements, if any.
+    current = threading.local()
+
+    def __init__(self, level=1, workers=0, executor=None):
+        self.level = level
+        self.workers = workers
+        self.executor = executor
+        self.own_executor = None
+        self.previous = None
+
+    def __enter__(self):
+        if self.workers and self.executor is None:
+            self.executor = self.own_executor = ThreadPoolExecutor(self.workers)
+        self.previous = getattr(self.current, "compression", None)
+        self.current.compression = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.current.compression = self.previous
+        self.previous = None
+        if self.own_executor is not None:
+            self.own_executor.shutdown(wait=True)
+            self.executor = self.own_executor = None
+
+    @classmethod
+    def get_current(cls):
+        """
+        Return the compression context of current thread, or a default one (same as encode_bin) if none.
+        """
+        compression = getattr(cls.current, "compression", None)
+        return compression if compression is not None else cls()
+
+    def add_array(self, elem, data, array_type, prop_type):
+        """
+        Same as encode_bin.FBXElem._add_array_helper(), with our level and threaded compression.
+        """
+        assert(isinstance(data, array.array))
+        assert(data.typecode == array_type)
+
+        length = len(data)
+
+        if sys.byteorder != 'little':
+            data = data[:]
+            data.byteswap()
+        data = data.tobytes()
+
+        # mimic behavior of fbxconverter (also common sense)
+        if len(data) <= 128:
+            data = struct.pack('<3I', length, 0, len(data)) + data
+        elif self.executor is not None and len(data) >= self.threaded_min_size:
+            data = FBXCompressedArray(length, self.executor.submit(zlib.compress, data, self.level))
+        else:
+            data = zlib.compress(data, self.level)
+            data = struct.pack('<3I', length, 1, len(data)) + data
+
+        elem.props_type.append(prop_type)
+        elem.props.append(data)
+
+    @staticmethod
+    def resolve(elem):
+        """
+        Replace all FBXCompressedArray properties of elem and its children by their actual data.
+        """
+        elems = [elem]
+        while elems:
+            elem = elems.pop()
+            elem.props[:] = [data.result() if isinstance(data, FBXCompressedArray) else data for data in elem.props]
+            elems.extend(elem.elems)
+
+
+def fbx_elem_data_single_array(elem, name, value, array_type, prop_type):
+    """
+    Same as fbx_utils' elem_data_single_*_array() helpers, the array being compressed by the FBXArrayCompression
+    context of current thread.
+    """
+    sub_elem = elem_empty(elem, name)
+    if not isinstance(value, array.array):
+        value = array.array(array_type, value)
+    FBXArrayCompression.get_current().add_array(sub_elem, value, array_type, prop_type)
+    return sub_elem
+
+
+def elem_data_single_bool_array(elem, name, value):
+    return fbx_elem_data_single_array(elem, name, value, data_types.ARRAY_BOOL, data_types.BOOL_ARRAY)
+
+
+def elem_data_single_int32_array(elem, name, value):
+    return fbx_elem_data_single_array(elem, name, value, data_types.ARRAY_INT32, data_types.INT32_ARRAY)
+
+
+def elem_data_single_int64_array(elem, name, value):
+    return fbx_elem_data_single_array(elem, name, value, data_types.ARRAY_INT64, data_types.INT64_ARRAY)
+
+
+def elem_data_single_float32_array(elem, name, value):
+    return fbx_elem_data_single_array(elem, name, value, data_types.ARRAY_FLOAT32, data_types.FLOAT32_ARRAY)
+
+
+def elem_data_single_float64_array(elem, name, value):
+    return fbx_elem_data_single_array(elem, name, value, data_types.ARRAY_FLOAT64, data_types.FLOAT64_ARRAY)
+
+
+# Private encode_bin names FBXStreamWriter relies on.
+FBX_STREAM_WRITE_NAMES = ("_HEAD_MAGIC", "_BLOCK_SENTINEL_DATA", "_ELEMS_ID_ALWAYS_BLOCK_SENTINEL", "_FOOT_ID",
+                          "_write_timedate_hack", "FBXElem._calc_offsets", "FBXElem._write")
+
+
+def encode_bin_missing(names):
+    """
+    Return the (possibly dotted) names missing from encode_bin.
+    """
+    missing = []
+    for name in names:
+        item = encode_bin
+        for attr in name.split("."):
+            item = getattr(item, attr, None)
+        if item is None:
+            missing.append(name)
+    return tuple(missing)
+
+
+# Those missing from current encode_bin, checked once here so that a changed encode_bin fails clearly (see
+# FBXStreamWriter) instead of writing corrupt files.
+FBX_STREAM_WRITE_MISSING = encode_bin_missing(FBX_STREAM_WRITE_NAMES)
+
+
+class FBXStreamWriter:
+    """
+    Binary FBX writer flushing elements as soon as they are complete, instead of writing the whole elements tree at
+    once like encode_bin.write(), which keeps peak memory usage bounded.
+    Elements whose children are streamed (i.e. Objects) are opened by begin(), their current children written (and
+    freed) by each write() call, and closed by end(), which back-patches their end offset.
+    The last child of each level is kept pending until another one follows or the level ends, since the last child
+    of an element may be encoded differently.
+    """
+    def __init__(self, filepath, version):
+        if FBX_STREAM_WRITE_MISSING:
+            raise RuntimeError("encode_bin lacks %s, cannot stream FBX files" % ", ".join(FBX_STREAM_WRITE_MISSING))
+        self.version = version
+        self.file = open(filepath, 'wb')
+        self.file.write(encode_bin._HEAD_MAGIC)
+        self.file.write(struct.pack('<I', version))
+        # Opened levels, as [element, position of its end offset, pending child, number of written children].
+        self.levels = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.finish()
+        finally:
+            self.file.close()
+
+    def _write_data(self, data):
+        self.file.write(data.result() if isinstance(data, FBXCompressedArray) else data)
+
+    def _write_pending(self, level, is_last):
+        elem = level[2]
+        if elem is not None:
+            f = self.file
+            elem._calc_offsets(f.tell(), is_last)
+            elem._write(self._write_data, f.tell, is_last)
+            level[2] = None
+            level[3] += 1
+
+    def write(self, parent):
+        """
+        Write and free current children of parent, which is the root element or the last opened one.
+        """
+        if not self.levels:
+            assert(parent.id == b"")
+            self.levels.append([parent, None, None, 0])
+        level = self.levels[-1]
+        assert(level[0] is parent)
+        for elem in parent.elems:
+            self._write_pending(level, False)
+            level[2] = elem
+        del parent.elems[:]
+
+    def begin(self, elem):
+        """
+        Open elem, last child of the current level, whose children will then be written by write() calls.
+        """
+        level = self.levels[-1]
+        parent = level[0]
+        assert(parent.elems and parent.elems[-1] is elem)
+        parent.elems.pop()
+        self.write(parent)
+        self._write_pending(level, False)
+
+        f = self.file
+        self.levels.append([elem, f.tell(), None, 0])
+        f.write(struct.pack('<3I', 0, len(elem.props), sum(1 + len(data) for data in elem.props)))
+        f.write(bytes((len(elem.id),)))
+        f.write(elem.id)
+        for prop_type, data in zip(elem.props_type, elem.props):
+            f.write(bytes((prop_type,)))
+            self._write_data(data)
+
+    def end(self):
+        """
+        Close the last opened element, after writing its remaining children.
+        """
+        level = self.levels[-1]
+        elem, end_offset_pos = level[0], level[1]
+        self.write(elem)
+        self._write_pending(level, True)
+        del self.levels[-1]
+
+        f = self.file
+        # Note: opened elements are assumed to never be the last child of their parent.
+        if level[3] or not elem.props or elem.id in encode_bin._ELEMS_ID_ALWAYS_BLOCK_SENTINEL:
+            f.write(encode_bin._BLOCK_SENTINEL_DATA)
+        end_offset = f.tell()
+        f.seek(end_offset_pos)
+        f.write(struct.pack('<I', end_offset))
+        f.seek(end_offset)
+        self.levels[-1][3] += 1
+
+    def finish(self):
+        """
+        Write remaining root children and the file footer (same as encode_bin.write()).
+        """
+        assert(len(self.levels) == 1)
+        level = self.levels[0]
+        self.write(level[0])
+        self._write_pending(level, True)
+        f = self.file
+        if level[3]:
+            f.write(encode_bin._BLOCK_SENTINEL_DATA)
+
+        f.write(encode_bin._FOOT_ID)
+        f.write(b'\x00' * 4)
+        # padding for alignment (values between 1 & 16 observed)
+        # if already aligned to 16, add a full 16 bytes padding.
+        ofs = f.tell()
+        pad = ((ofs + 15) & ~15) - ofs
+        if pad == 0:
+            pad = 16
+        f.write(b'\0' * pad)
+        f.write(struct.pack('<I', self.version))
+        # unknown magic (always the same)
+        f.write(b'\0' * 120)
+        f.write(b'\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b')
+
+
+def fbx_write(filepath, scene_data, timings=None):
+    """
+    Generate all FBX elements from given scene data, and write them into filepath.
+    With use_stream_write setting, elements are written as they are generated (see FBXStreamWriter).
+    Arrays are compressed according to compression_level and compression_workers settings (see FBXArrayCompression).
+    """
+    settings = scene_data.settings
+    with FBXArrayCompression(settings.compression_level, settings.compression_workers) as compression:
+        if settings.use_stream_write:
+            with FBXStreamWriter(filepath, FBX_VERSION) as writer:
+                fbx_write_elements(scene_data, timings, writer)
+        else:
+            root = fbx_write_elements(scene_data, timings)
+
+            perfmon = PerfMonTimings(timings)
+            perfmon.level_up()
+            perfmon.step("FBX export writing file...", "write")
+
+            # And we are down, we can write the whole thing!
+            compression.resolve(root)
+            encode_bin.write(filepath, root, FBX_VERSION)
+
+            perfmon.level_down()
+
+
+# Single thread encoding and writing files in the background (see fbx_write_background()), in submission order.
+fbx_write_executor = ThreadPoolExecutor(1)
+
+
+def fbx_write_background(filepath, scene_data, timings=None, copy_set=()):
+    """
+    Generate all FBX elements from given scene data, then encode and write them into filepath, and copy copy_set
+    files (see bpy_extras.io_utils.path_reference_copy()), on a background thread.
+    Only generation reads Blender data, it is done before returning. Elements are hence kept in memory until written
+    (use_stream_write setting is ignored), while their arrays keep being compressed.
+    Return a concurrent.futures.Future of the writing, timings being complete once it is done.
+    """
     import bpy_extras.io_utils
 
-    print('\nFBX export starting... %r' % filepath)
-    start_time = time.process_time()
+    settings = scene_data.settings
+    executor = ThreadPoolExecutor(settings.compression_workers) if settings.compression_workers else None
+    try:
+        with FBXArrayCompression(settings.compression_level, settings.compression_workers, executor):
+            root = fbx_write_elements(scene_data, timings)
+    except:
+        if executor is not None:
+            executor.shutdown(wait=False)
+        raise
 
-    # Generate some data about exported scene...
-    scene_data = fbx_data_from_scene(scene, settings)
+    def write():
+        try:
+            perfmon = PerfMonTimings(timings)
+            perfmon.level_up()
+            perfmon.step("FBX export writing file (in background)...", "write")
+
+            FBXArrayCompression.resolve(root)
+            encode_bin.write(filepath, root, FBX_VERSION)
+
+            if copy_set:
+                perfmon.step("FBX export copying textures (in background)...", "copy_textures")
+                bpy_extras.io_utils.path_reference_copy(copy_set)
+
+            perfmon.level_down()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    return fbx_write_executor.submit(write)
+
+
+def fbx_write_elements(scene_data, timings=None, writer=None):
+    """
+    Generate all FBX elements from given scene data, and return their root.
+    If writer (a FBXStreamWriter) is given, they are written (and freed) as they are generated instead.
+    """
+    perfmon = PerfMonTimings(timings)
+    perfmon.level_up()
+    perfmon.step("FBX export generating header elements...", "elements")
 
     root = elem_empty(None, b"")  # Root element has no id, as it is not saved per se!
 
@@ -2972,8 +4428,16 @@ def save_single(operator, scene, filepath="",
     # Templates definitions.
     fbx_definitions_elements(root, scene_data)
 
-    # Actual data.
-    fbx_objects_elements(root, scene_data)
+    if writer is not None:
+        # Done by encode_bin.write() otherwise.
+        encode_bin._write_timedate_hack(root)
+        writer.write(root)
+
+    # Actual data (timed per kind of data by fbx_objects_elements itself).
+    perfmon.step("FBX export generating objects elements...")
+    fbx_objects_elements(root, scene_data, timings, writer)
+
+    perfmon.step("FBX export generating connections elements...", "elements")
 
     # How data are inter-connected.
     fbx_connections_elements(root, scene_data)
@@ -2981,23 +4445,268 @@ def save_single(operator, scene, filepath="",
     # Animation.
     fbx_takes_elements(root, scene_data)
 
-    # Cleanup!
-    fbx_scene_data_cleanup(scene_data)
+    if writer is not None:
+        writer.write(root)
+
+    perfmon.level_down()
+    return root
 
-    # And we are down, we can write the whole thing!
-    encode_bin.write(filepath, root, FBX_VERSION)
 
-    # Clear cached ObjectWrappers!
+# This func can be called with just the filepath
+# timings, if given, is a dict filled with the duration of each export phase (in seconds).
+# bake_cache_key, if given, caches the baked animation in fbx_bake_cache under that key.
+# background, if True, makes encoding, writing and textures copy happen on a background thread (see
+# fbx_write_background()), returning a concurrent.futures.Future of it instead.
+# This is an export steps generator (see fbx_run_steps()), yielding progress while baking animations, save_single()
+# runs it to its end.
+def save_single_steps(operator, scene, filepath="", timings=None, bake_cache_key=None, background=False, **kwargs):
+
+    # Clear cached ObjectWrappers (just in case...).
     ObjectWrapper.cache_clear()
 
+    settings = fbx_export_settings(operator, scene, filepath, **kwargs)
+    media_settings = settings.media_settings
+
+    import bpy_extras.io_utils
+
+    print('\nFBX export starting... %r' % filepath)
+    start_time = time.process_time()
+
+    # Generate some data about exported scene...
+    try:
+        scene_data = yield from fbx_data_from_scene_steps(scene, settings, timings, bake_cache_key)
+    except:
+        # Failed, or cancelled (GeneratorExit) while baking, temp meshes being already removed at this point.
+        ObjectWrapper.cache_clear()
+        raise
+
+    try:
+        if background:
+            copy_set = () if media_settings.embed_textures else set(media_settings.copy_set)
+            write = fbx_write_background(filepath, scene_data, timings, copy_set)
+        else:
+            fbx_write(filepath, scene_data, timings)
+    finally:
+        # Cleanup!
+        fbx_scene_data_cleanup(scene_data)
+
+        # Clear cached ObjectWrappers!
+        ObjectWrapper.cache_clear()
+
+    if background:
+        print('export data gathered in %.4f sec., writing in background.' % (time.process_time() - start_time))
+        return write
+
     # copy all collected files, if we did not embed them.
     if not media_settings.embed_textures:
+        copy_start = time.perf_counter()
         bpy_extras.io_utils.path_reference_copy(media_settings.copy_set)
+        if timings is not None:
+            timings["copy_textures"] = time.perf_counter() - copy_start
 
     print('export finished in %.4f sec.' % (time.process_time() - start_time))
     return {'FINISHED'}
 
 
+def save_single(operator, scene, filepath="", timings=None, bake_cache_key=None, background=False, **kwargs):
+    """
+    Same as save_single_steps(), run to its end.
+    """
+    return fbx_run_steps(save_single_steps(operator, scene, filepath, timings, bake_cache_key, background, **kwargs))
+
+
+class FBXActionBaker:
+    """
+    Bake actions of anim_ob one after the other, each over its own frame range.
+    Unlike bake_anim_use_all_actions, only the active action and pose of anim_ob are changed, and restored on close()
+    (no object copy), and actions are not validated against all objects.
+    timings, if given, is a dict accumulating the baking duration (in seconds).
+    bake_cache_keys, if given, maps action names to the keys caching their bake in fbx_bake_cache.
+    """
+    def __init__(self, scene_data, anim_ob, timings=None, bake_cache_keys=None):
+        self.scene_data = scene_data
+        self.anim_ob = anim_ob
+        self.timings = timings
+        self.bake_cache_keys = bake_cache_keys
+        self.org_act = anim_ob.animation_data.action
+        self.pbones_matrices = ([pbo.matrix_basis.copy() for pbo in anim_ob.pose.bones]
+                                if anim_ob.type == 'ARMATURE' else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def restore_pose(self):
+        if self.pbones_matrices is not None:
+            for pbo, mat in zip(self.anim_ob.pose.bones, self.pbones_matrices):
+                pbo.matrix_basis = mat.copy()
+
+    def bake_steps(self, act):
+        """
+        Bake given action, returning its animation (None when nothing is animated).
+        Export steps generator (see fbx_run_steps()), yielding progress after each baked frame.
+        """
+        self.anim_ob.animation_data.action = act
+        f_start, f_end = act.frame_range  # sic!
+        cache_key = self.bake_cache_keys.get(act.name) if self.bake_cache_keys is not None else None
+        bake_start = time.perf_counter()
+        try:
+            anim = yield from fbx_animations_do_steps(self.scene_data, act, f_start, f_end, False, cache_key=cache_key)
+        finally:
+            self.restore_pose()
+        if self.timings is not None:
+            self.timings["bake_animations"] = (self.timings.get("bake_animations", 0.0) +
+                                               time.perf_counter() - bake_start)
+        return anim
+
+    def close(self):
+        self.anim_ob.animation_data.action = self.org_act
+        self.restore_pose()
+        # Be sure to update all matrices back to org state!
+        scene = self.scene_data.scene
+        scene.frame_set(scene.frame_current, 0.0)
+
+
+def fbx_scene_data_animated(static_data, settings, animations, frame_start, frame_end):
+    """
+    Return static scene data (gathered without animation) completed with given animations, their templates and
+    connections, static data itself being left unchanged.
+    """
+    animated = set()
+    for _astack_key, astack, _alayer_key, _name, _fstart, _fend in animations:
+        for elem_key, (_alayer_key, acurvenodes) in astack.items():
+            for fbx_prop in acurvenodes.keys():
+                animated.add((elem_key, fbx_prop))
+
+    templates = OrderedDict(static_data.templates)
+    connections = list(static_data.connections)
+    if animations:
+        fbx_animations_templates(static_data.scene, settings, animations, templates)
+        fbx_animations_connections(animations, connections)
+
+    return static_data._replace(
+        templates=templates, templates_users=sum(tmpl.nbr_users for tmpl in templates.values()),
+        connections=connections, settings=settings, animations=animations, animated=animated,
+        frame_start=frame_start, frame_end=frame_end,
+    )
+
+
+def fbx_static_data_from_scene(operator, scene, filepath, timings=None, **kwargs):
+    """
+    Gather scene data without any animation, returning it with the settings to use to bake animations on top of it.
+    """
+    kwargs["bake_anim"] = False
+    settings = fbx_export_settings(operator, scene, filepath, **kwargs)
+    settings_anim = settings._replace(bake_anim=True, bake_anim_use_nla_strips=False, bake_anim_use_all_actions=False)
+    return fbx_data_from_scene(scene, settings, timings), settings_anim
+
+
+def save_actions_steps(operator, scene, anim_ob, actions_filepaths, timings=None, bake_cache_keys=None, **kwargs):
+    """
+    Export each given action of anim_ob into its own file, from a list of (action, filepath) pairs.
+    Export steps generator (see fbx_run_steps()), yielding progress while baking each action.
+    Unlike calling save_single once per action, the static scene data (wrapped objects, meshes, bones, skins and
+    templates) is only gathered once, and only the animation stack is baked again for each file.
+    Each action is baked over its own frame range.
+    timings, if given, is a dict filled with the total duration of each export phase (in seconds).
+    bake_cache_keys, if given, maps action names to the keys caching their bake in fbx_bake_cache.
+    """
+    ObjectWrapper.cache_clear()
+
+    actions_filepaths = tuple(actions_filepaths)
+    if not actions_filepaths:
+        return {'CANCELLED'}
+
+    print('\nFBX actions export starting... (%d actions)' % len(actions_filepaths))
+    start_time = time.process_time()
+
+    # Static data must not contain any animation, we bake it ourselves below.
+    static_data, settings_anim = fbx_static_data_from_scene(operator, scene, actions_filepaths[0][1], timings,
+                                                            **kwargs)
+    # Baking needs the 'real' animation settings.
+    bake_data = static_data._replace(settings=settings_anim)
+
+    try:
+        with FBXActionBaker(bake_data, anim_ob, timings, bake_cache_keys) as baker:
+            for act, filepath in actions_filepaths:
+                anim = yield from baker.bake_steps(act)
+                f_start, f_end = act.frame_range  # sic!
+                animations = [anim] if anim is not None else []
+                scene_data = fbx_scene_data_animated(static_data, settings_anim, animations, f_start, f_end)
+
+                print('FBX action export: %r -> %r' % (act.name, filepath))
+                fbx_write(filepath, scene_data, timings)
+    finally:
+        fbx_scene_data_cleanup(static_data)
+        ObjectWrapper.cache_clear()
+
+    print('actions export finished in %.4f sec.' % (time.process_time() - start_time))
+    return {'FINISHED'}
+
+
+def save_actions(operator, scene, anim_ob, actions_filepaths, timings=None, bake_cache_keys=None, **kwargs):
+    """
+    Same as save_actions_steps(), run to its end.
+    """
+    return fbx_run_steps(save_actions_steps(operator, scene, anim_ob, actions_filepaths, timings, bake_cache_keys,
+                                            **kwargs))
+
+
+def save_takes_steps(operator, scene, anim_ob, actions, filepath, timings=None, bake_cache_keys=None, **kwargs):
+    """
+    Export all given actions of anim_ob into a single file, each one as its own animation stack (take).
+    Export steps generator (see fbx_run_steps()), yielding progress while baking each action.
+    Static scene data (wrapped objects, meshes, bones, skins and templates) is gathered and written only once,
+    and each action is baked over its own frame range.
+    timings, if given, is a dict filled with the total duration of each export phase (in seconds).
+    bake_cache_keys, if given, maps action names to the keys caching their bake in fbx_bake_cache.
+    """
+    ObjectWrapper.cache_clear()
+
+    actions = tuple(actions)
+    if not actions:
+        return {'CANCELLED'}
+
+    print('\nFBX takes export starting... (%d actions) %r' % (len(actions), filepath))
+    start_time = time.process_time()
+
+    static_data, settings_anim = fbx_static_data_from_scene(operator, scene, filepath, timings, **kwargs)
+    bake_data = static_data._replace(settings=settings_anim)
+
+    try:
+        animations = []
+        with FBXActionBaker(bake_data, anim_ob, timings, bake_cache_keys) as baker:
+            for act in actions:
+                anim = yield from baker.bake_steps(act)
+                if anim is not None:
+                    animations.append(anim)
+
+        if animations:
+            frame_start = min(anim[4] for anim in animations)
+            frame_end = max(anim[5] for anim in animations)
+        else:
+            frame_start, frame_end = scene.frame_start, scene.frame_end
+        scene_data = fbx_scene_data_animated(static_data, settings_anim, animations, frame_start, frame_end)
+
+        fbx_write(filepath, scene_data, timings)
+    finally:
+        fbx_scene_data_cleanup(static_data)
+        ObjectWrapper.cache_clear()
+
+    print('takes export finished in %.4f sec.' % (time.process_time() - start_time))
+    return {'FINISHED'}
+
+
+def save_takes(operator, scene, anim_ob, actions, filepath, timings=None, bake_cache_keys=None, **kwargs):
+    """
+    Same as save_takes_steps(), run to its end.
+    """
+    return fbx_run_steps(save_takes_steps(operator, scene, anim_ob, actions, filepath, timings, bake_cache_keys,
+                                          **kwargs))
+
+
 # defaults for applications, currently only unity but could add others.
 def defaults_unity3d():
     return {
@@ -28,7 +28,19 @@ bl_info = {
 
 import math
 import bpy
+import numpy as np
 import sys
+import json
+import time
+from collections import OrderedDict, deque, namedtuple
+import hashlib
+import argparse
+import shutil
+import tempfile
+import subprocess
+from array import array
+from bpy.app.handlers import persistent
+from fnmatch import fnmatchcase
 from os.path import abspath, exists, join, sep
 
 
@@ -55,6 +67,15 @@ else:
 
 from io_scene_fbx import export_fbx_bin
 
+if not hasattr(export_fbx_bin, "save_actions"):
+    raise RuntimeError("io_scene_fbx uses the stock export_fbx_bin, "
+                       "replace it with data/export_fbx_bin.py")
+
+if export_fbx_bin.FBX_STREAM_WRITE_MISSING:
+    raise RuntimeError("io_scene_fbx's encode_bin lacks " +
+                       ", ".join(export_fbx_bin.FBX_STREAM_WRITE_MISSING) +
+                       ", needed to stream fbx files")
+
 # dict containing the custom properties to export an action sequence
 as_export_kwargs = dict(apply_unit_scale=True,
                         axis_up="Z",
@@ -65,9 +86,17 @@ as_export_kwargs = dict(apply_unit_scale=True,
                         bake_anim_use_nla_strips=False,
                         bake_anim_use_all_actions=False,
                         bake_anim_simplify_factor=0.0,
+                        # max errors of the baked curves: location (m),
+                        # rotation (degrees), scale, shape keys (%)
+                        bake_anim_simplify_error=(0.0005, 0.05, 0.0005,
+                                                  0.05),
+                        bake_anim_pose_only=True,
+                        # plain FK actions are baked from their fcurves
+                        bake_anim_analytic=True,
                         add_leaf_bones=False,
                         use_mesh_edges=False,
-                        use_tspace=False)
+                        use_tspace=False,
+                        use_stream_write=True)
 
 
 # dict containing the custom properties to export a skeletal mesh
@@ -79,65 +108,967 @@ sk_export_kwargs = dict(apply_unit_scale=True,
                         bake_anim=False,
                         add_leaf_bones=False,
                         use_mesh_edges=False,
-                        use_tspace=False)
+                        use_tspace=False,
+                        use_stream_write=True)
+
+
+# name of the file recording the content hash of each exported file
+manifest_name = "sg_manifest.json"
+
+# name of the file to which the export phase timings are appended
+timings_log_name = "sg_timings.jsonl"
+
+# export phase timings of the last export, shown in the panel
+last_export = {"name": "", "timings": OrderedDict()}
+
+# names of the AS_ actions and objects changed since the last save, when
+# auto export is enabled, and of the actions and skeletal meshes to export
+# again, until successfully exported
+auto_export_dirty = {"actions": set(), "objects": set(),
+                     "skeletal_meshes": set()}
+
+# an export waiting in the queue: kind is "action_sequence" (an action
+# baked over the scene frame range), "action" (an action baked over its own
+# frame range) or "skeletal_mesh", name is the name of the action or of the
+# skeletal mesh, and objects the names of the exported objects
+ExportJob = namedtuple("ExportJob", ("kind", "name", "objects",
+                                     "overwrite", "incremental"))
+
+# exports waiting to be run, as ExportJob tuples
+export_queue = deque()
+
+# seconds spent running queued exports per timer event, at least one export
+# step (a whole export, or a baked frame) being run each time
+export_queue_slice = 0.1
+
+# whether the operator running the export queue is running
+export_queue_state = {"running": False}
+
+# whether the actions baked from their fcurves are also baked by evaluating
+# the scene, to report the differences (set from the command line, and not
+# part of the hashed export parameters)
+bake_check = {"enabled": False}
+
+# progress of the export queue, shown in the panel: the number of exports
+# done since the queue started running and when it started, the running
+# export and the fraction of its frames already baked
+export_queue_stats = {"done": 0, "start": 0.0, "job": None, "fraction": 0.0}
+
+# files being written in the background, as (future, file name, finish)
+# tuples, finish being called with an operator once the file is written
+pending_writes = []
+
+# scene property remembering the objects of each exported skeletal mesh
+skeletal_meshes_prop = "sg_skeletal_meshes"
+
+# scene property remembering the armature of each action last exported as
+# an action sequence over the scene frame range
+action_sequences_prop = "sg_action_sequences"
+
+
+def load_manifest(path: str) -> dict:
+    """
+    Loads the export manifest of a folder\t
+    :param path: the folder containing the manifest\t
+    :return: a dict of file names to content hashes, empty if none
+    """
+
+    manifest_path = join(path, manifest_name)
+    if not exists(manifest_path):
+        return {}
+
+    try:
+        with open(manifest_path, "r") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path: str, manifest: dict):
+    """
+    Saves the export manifest of a folder\t
+    :param path: the folder in which to write the manifest\t
+    :param manifest: a dict of file names to content hashes\t
+    :return: nothing
+    """
+
+    with open(join(path, manifest_name), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4, sort_keys=True)
 
 
-def export_fbx(operator, context, objects, name, kwargs):
+def hash_kwargs(digest, kwargs):
+    """
+    Feeds export parameters and the add-on version into a hash\t
+    :param digest: the hashlib object to update\t
+    :param kwargs: a dict containing the export parameters\t
+    :return: nothing
+    """
+
+    digest.update(repr(bl_info["version"]).encode())
+    for key in sorted(kwargs):
+        value = kwargs[key]
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        digest.update(repr((key, value)).encode())
+
+
+def hash_collection(digest, collection, attr, size, typecode="f"):
+    """
+    Feeds a property of every item of a collection into a hash,
+    using a single foreach_get\t
+    :param digest: the hashlib object to update\t
+    :param collection: the bpy collection to read\t
+    :param attr: the name of the property to read\t
+    :param size: the number of values of the property per item\t
+    :param typecode: the array typecode of the values\t
+    :return: nothing
+    """
+
+    values = array(typecode, [0]) * (len(collection) * size)
+    collection.foreach_get(attr, values)
+    digest.update(values.tobytes())
+
+
+def hash_rna(digest, struct, depth=2):
+    """
+    Feeds every property of a bpy struct into a hash, pointed data blocks
+    by name, and other pointed structs and collections recursively\t
+    :param digest: the hashlib object to update\t
+    :param struct: the bpy struct to hash\t
+    :param depth: how many levels of structs to follow\t
+    :return: nothing
+    """
+
+    for prop in struct.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier == "rna_type":
+            continue
+
+        value = getattr(struct, identifier, None)
+        if prop.type == "COLLECTION":
+            if depth:
+                for item in value:
+                    hash_rna(digest, item, depth - 1)
+            continue
+        if prop.type == "POINTER":
+            if isinstance(value, bpy.types.ID):
+                value = value.name
+            elif value is not None:
+                if depth:
+                    hash_rna(digest, value, depth - 1)
+                continue
+        elif isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        elif getattr(prop, "array_length", 0):
+            value = tuple(value)
+        digest.update(repr((identifier, value)).encode())
+
+
+def hash_armature(digest, armature):
+    """
+    Feeds the rest pose of an armature into a hash\t
+    :param digest: the hashlib object to update\t
+    :param armature: the armature object\t
+    :return: nothing
+    """
+
+    bones = armature.data.bones
+    hash_collection(digest, bones, "head_local", 3)
+    hash_collection(digest, bones, "tail_local", 3)
+    for bone in bones:
+        digest.update(repr((bone.name,
+                            bone.parent.name if bone.parent else None,
+                            bone.use_deform,
+                            [tuple(row) for row in bone.matrix_local]))
+                      .encode())
+    digest.update(repr([tuple(row) for row in armature.matrix_world])
+                  .encode())
+    digest.update(repr(sorted(excluded_bones(armature))).encode())
+
+
+def hash_action(obj, action, kwargs) -> str:
+    """
+    Computes the content hash of an action sequence export\t
+    :param obj: the armature animated by the action\t
+    :param action: the action to hash\t
+    :param kwargs: a dict containing the export parameters\t
+    :return: the hexadecimal hash
+    """
+
+    digest = hashlib.sha1()
+    hash_kwargs(digest, kwargs)
+    digest.update(repr(tuple(action.frame_range)).encode())
+
+    for fcurve in action.fcurves:
+        digest.update(repr((fcurve.data_path, fcurve.array_index,
+                            fcurve.extrapolation, fcurve.mute)).encode())
+        points = fcurve.keyframe_points
+        hash_collection(digest, points, "co", 2)
+        hash_collection(digest, points, "handle_left", 2)
+        hash_collection(digest, points, "handle_right", 2)
+        # enums cannot be read through foreach_get
+        digest.update(repr([point.interpolation for point in points])
+                      .encode())
+        for modifier in fcurve.modifiers:
+            hash_rna(digest, modifier)
+
+    if obj is not None and obj.type == "ARMATURE":
+        hash_armature(digest, obj)
+        digest.update(repr([(bone.name, bone.rotation_mode)
+                            for bone in obj.pose.bones]).encode())
+
+    return digest.hexdigest()
+
+
+def object_drivers(obj) -> list:
+    """
+    Gets the drivers of an object and of its data\t
+    :param obj: the object\t
+    :return: the list of driver fcurves
+    """
+
+    drivers = []
+    for owner in (obj, obj.data):
+        animation = getattr(owner, "animation_data", None)
+        if animation is not None:
+            drivers.extend(animation.drivers)
+    return drivers
+
+
+def object_targets(obj) -> list:
+    """
+    Gets the objects targeted by the constraints of an object and of its
+    pose bones, and by its drivers\t
+    :param obj: the object\t
+    :return: the list of target objects, possibly with duplicates
+    """
+
+    constraints = list(obj.constraints)
+    if obj.pose is not None:
+        for bone in obj.pose.bones:
+            constraints.extend(bone.constraints)
+
+    targets = []
+    for constraint in constraints:
+        for attr in ("target", "pole_target"):
+            target = getattr(constraint, attr, None)
+            if isinstance(target, bpy.types.Object):
+                targets.append(target)
+    for driver in object_drivers(obj):
+        for variable in driver.driver.variables:
+            for target in variable.targets:
+                if isinstance(target.id, bpy.types.Object):
+                    targets.append(target.id)
+    return targets
+
+
+def hash_drivers(digest, obj):
+    """
+    Feeds the drivers of an object and of its data into a hash: their
+    expressions, variables, targets and curves\t
+    :param digest: the hashlib object to update\t
+    :param obj: the object\t
+    :return: nothing
+    """
+
+    for fcurve in object_drivers(obj):
+        digest.update(repr((fcurve.data_path, fcurve.array_index,
+                            fcurve.mute)).encode())
+        hash_rna(digest, fcurve.driver)
+        hash_collection(digest, fcurve.keyframe_points, "co", 2)
+        for modifier in fcurve.modifiers:
+            hash_rna(digest, modifier)
+
+
+def hash_bake(context, obj, action, kwargs, objects) -> str:
+    """
+    Computes the key under which the bake of an action is cached: the
+    action, the rest pose, constraints, drivers and rotation modes of every
+    exported armature, the actions or static poses of the other armatures,
+    the transforms or actions of the constraint and driver targets and the
+    scene units\t
+    :param context: the context in which the action is baked\t
+    :param obj: the armature animated by the action\t
+    :param action: the action to bake\t
+    :param kwargs: a dict containing the export parameters\t
+    :param objects: the objects exported with the action\t
+    :return: the hexadecimal hash
+    """
+
+    digest = hashlib.sha1()
+    digest.update(hash_action(obj, action, kwargs).encode())
+    units = context.scene.unit_settings
+    digest.update(repr((units.system, units.scale_length)).encode())
+
+    armatures = [other for other in objects if other.type == "ARMATURE"]
+    targets = set()
+    for other in sorted(armatures, key=lambda o: o.name):
+        digest.update(other.name.encode())
+        hash_armature(digest, other)
+        bones = other.pose.bones
+        digest.update(repr([(bone.name, bone.rotation_mode)
+                            for bone in bones]).encode())
+
+        animation = other.animation_data
+        if other != obj and animation is not None and animation.action:
+            digest.update(hash_action(other, animation.action, kwargs)
+                          .encode())
+        elif other != obj:
+            # not animated, its current pose is the same on every frame
+            for attr, size in (("location", 3), ("rotation_quaternion", 4),
+                               ("rotation_euler", 3), ("scale", 3)):
+                hash_collection(digest, bones, attr, size)
+
+        for constraint in other.constraints:
+            hash_rna(digest, constraint)
+        for bone in bones:
+            for constraint in bone.constraints:
+                digest.update(bone.name.encode())
+                hash_rna(digest, constraint)
+        hash_drivers(digest, other)
+        targets.update(object_targets(other))
+
+    for target in sorted(targets.difference(armatures),
+                         key=lambda o: o.name):
+        digest.update(repr((target.name, target.type,
+                            getattr(target.parent, "name", None),
+                            target.parent_type, target.parent_bone))
+                      .encode())
+        animation = target.animation_data
+        if animation is not None and animation.action:
+            digest.update(hash_action(target, animation.action, kwargs)
+                          .encode())
+        else:
+            digest.update(repr([tuple(row) for row in target.matrix_world])
+                          .encode())
+        hash_drivers(digest, target)
+
+    return digest.hexdigest()
+
+
+def hash_skeletal_mesh(objects, kwargs) -> str:
+    """
+    Computes the content hash of a skeletal mesh export\t
+    :param objects: the list of objects exported together\t
+    :param kwargs: a dict containing the export parameters\t
+    :return: the hexadecimal hash
+    """
+
+    digest = hashlib.sha1()
+    hash_kwargs(digest, kwargs)
+
+    for obj in sorted(objects, key=lambda o: o.name):
+        digest.update(repr((obj.name, obj.type)).encode())
+
+        if obj.type == "ARMATURE":
+            hash_armature(digest, obj)
+            continue
+
+        if obj.type != "MESH":
+            continue
+
+        mesh = obj.data
+        digest.update(repr([tuple(row) for row in obj.matrix_world]).encode())
+        digest.update(repr([(mod.type, mod.show_render,
+                             getattr(getattr(mod, "object", None), "name",
+                                     None))
+                            for mod in obj.modifiers]).encode())
+        digest.update(repr([(slot.link, slot.material.name
+                             if slot.material else None)
+                            for slot in obj.material_slots]).encode())
+
+        hash_collection(digest, mesh.vertices, "co", 3)
+        hash_collection(digest, mesh.loops, "vertex_index", 1, "i")
+        hash_collection(digest, mesh.polygons, "loop_start", 1, "i")
+        hash_collection(digest, mesh.polygons, "use_smooth", 1, "i")
+        hash_collection(digest, mesh.polygons, "material_index", 1, "i")
+        for uv_layer in mesh.uv_layers:
+            digest.update(uv_layer.name.encode())
+            hash_collection(digest, uv_layer.data, "uv", 2)
+        for color_layer in mesh.vertex_colors:
+            digest.update(color_layer.name.encode())
+            hash_collection(digest, color_layer.data, "color", 3)
+
+        if mesh.shape_keys is not None:
+            for key_block in mesh.shape_keys.key_blocks:
+                digest.update(repr((key_block.name, key_block.value,
+                                    key_block.relative_key.name,
+                                    key_block.vertex_group)).encode())
+                hash_collection(digest, key_block.data, "co", 3)
+
+        # weights have a variable length per vertex, no foreach_get for them
+        digest.update(repr([group.name for group in obj.vertex_groups])
+                      .encode())
+        weights = array("f")
+        groups = array("i")
+        for vertex in mesh.vertices:
+            for group in vertex.groups:
+                groups.append(group.group)
+                weights.append(group.weight)
+            groups.append(-1)
+        digest.update(groups.tobytes())
+        digest.update(weights.tobytes())
+
+    return digest.hexdigest()
+
+
+def log_timings(path: str, name: str, timings: OrderedDict):
+    """
+    Appends export phase timings to the timings log of a folder,
+    and keeps them to be shown in the panel\t
+    :param path: the folder containing the exported files\t
+    :param name: the name of the export, usually the file name\t
+    :param timings: a dict of export phases to durations in seconds\t
+    :return: nothing
+    """
+
+    last_export["name"] = name
+    last_export["timings"] = timings
+
+    entry = OrderedDict((("name", name), ("date", time.time()),
+                         ("total", sum(timings.values())),
+                         ("timings", timings)))
+    with open(join(path, timings_log_name), "a") as log_file:
+        log_file.write(json.dumps(entry) + "\n")
+
+
+def scene_export_kwargs(scene) -> dict:
+    """
+    Gets the export parameters set on the scene, which change how files
+    are written but not their content\t
+    :param scene: the scene holding the parameters\t
+    :return: a dict of export parameters
+    """
+
+    return dict(compression_level=scene.compression_level,
+                compression_workers=scene.compression_threads)
+
+
+def checked_bake_kwargs(kwargs: dict) -> dict:
+    """
+    Gets the export parameters with which to bake, the actions baked from
+    their fcurves being also baked by evaluating the scene when checking
+    bakes\t
+    :param kwargs: a dict containing the export parameters\t
+    :return: a dict of export parameters
+    """
+
+    if bake_check["enabled"] and kwargs.get("bake_anim_analytic"):
+        return dict(kwargs, bake_anim_analytic="CHECK")
+    return kwargs
+
+
+def bone_patterns(text: str) -> list:
+    """
+    Splits a comma separated list of bone name patterns\t
+    :param text: the list of patterns\t
+    :return: the list of non empty patterns
+    """
+
+    return [pattern.strip() for pattern in text.split(",")
+            if pattern.strip()]
+
+
+def excluded_bones(armature) -> set:
+    """
+    Gets the bones of an armature left out of its exports by its bone
+    rules: bones matching an exclude pattern, in an excluded bone group, or
+    not deforming when only deform bones are exported, unless they match a
+    keep pattern or are the parent of an object\t
+    :param armature: the armature object\t
+    :return: the set of excluded bone names
+    """
+
+    exclude = bone_patterns(armature.sg_bones_exclude)
+    keep = bone_patterns(armature.sg_bones_keep)
+    groups = set(bone_patterns(armature.sg_bones_exclude_groups))
+    deform_only = armature.sg_bones_deform_only
+    if not (exclude or groups or deform_only):
+        return set()
+
+    # objects parented to a bone would lose their parent
+    parents = {child.parent_bone for child in armature.children
+               if child.parent_type == "BONE"}
+
+    excluded = set()
+    for bone in armature.pose.bones:
+        name = bone.name
+        if name in parents or any(fnmatchcase(name, p) for p in keep):
+            continue
+        if (any(fnmatchcase(name, p) for p in exclude) or
+                (bone.bone_group is not None and
+                 bone.bone_group.name in groups) or
+                (deform_only and not bone.bone.use_deform)):
+            excluded.add(name)
+    return excluded
+
+
+def bone_export_kwargs(objects) -> dict:
+    """
+    Gets the export parameter leaving out the excluded bones of the
+    armatures among the exported objects\t
+    :param objects: the exported objects\t
+    :return: a dict of export parameters, empty if no bone is excluded
+    """
+
+    exclude_bones = {}
+    for obj in objects:
+        if obj.type == "ARMATURE":
+            names = excluded_bones(obj)
+            if names:
+                exclude_bones[obj.name] = sorted(names)
+    return dict(exclude_bones=exclude_bones) if exclude_bones else {}
+
+
+def action_export_objects(context, obj) -> list:
+    """
+    Gets the objects to export with the actions of an armature: when the
+    scene exports the active rig only, the armature and the objects driving
+    it (parents, constraint and driver targets, and theirs in turn),
+    otherwise every object of the scene\t
+    :param context: the context in which the armature resides\t
+    :param obj: the armature animated by the actions\t
+    :return: the list of objects
+    """
+
+    scene = context.scene
+    if not scene.export_active_rig_only:
+        return list(scene.objects)
+
+    objects = []
+    todo = [obj]
+    while todo:
+        other = todo.pop()
+        if other is None or other in objects or \
+                other.name not in scene.objects:
+            continue
+        objects.append(other)
+
+        todo.append(other.parent)
+        todo.extend(object_targets(other))
+    return objects
+
+
+def action_hash_kwargs(context, objects) -> dict:
+    """
+    Gets the export parameters to hash an action sequence export with:
+    the action sequence parameters, and the exported objects\t
+    :param context: the context in which the action is exported\t
+    :param objects: the objects exported with the action\t
+    :return: a dict of export parameters
+    """
+
+    return dict(as_export_kwargs,
+                export_active_rig_only=context.scene.export_active_rig_only,
+                context_objects=sorted(obj.name for obj in objects))
+
+
+def export_fbx_steps(operator, context, objects, name, kwargs,
+                     content_hash=None, background=False, written=None):
     """
     Exports objects to fbx, with the given name and parameters,
-    under the scene export path\t\t
+    under the scene export path, yielding the export progress while baking
+    animations\t\t
     :param operator: the operator though which we report messages\t
     :param context: the context to use\t
     :param objects: the list of objects to include in the exported file\t\t
     :param name: the base name of the file to export\t
     :param kwargs: a dict containing any additional parameters\t
-    :returns: nothing
+    :param content_hash: the hash of the exported content, to skip the export
+    if the file is unchanged since the last one\t
+    :param background: whether to write the file on a background thread,
+    the export being reported by the export queue operator once written\t
+    :param written: a function called without arguments once the file is
+    written, or found unchanged\t
+    :returns: a dict of export phases to durations in seconds,
+    or None if nothing was written
     """
 
+    export_path = str(context.scene.export_path)
     file_name = str(name) + ".fbx"
-    file_path = join(str(context.scene.export_path), file_name)
+    file_path = join(export_path, file_name)
     file_exists = exists(file_path)
 
+    if content_hash is not None:
+        manifest = load_manifest(export_path)
+        if file_exists and manifest.get(file_name) == content_hash:
+            operator.report({"INFO"}, "File unchanged: " + file_name)
+            if written is not None:
+                written()
+            return
+
     if file_exists and not operator.overwrite:
         operator.report({"ERROR"}, "File exists: " + file_name)
         return
 
-    export_fbx_bin.save_single(operator, context.scene,
-                               filepath=file_path,
-                               context_objects=objects,
-                               **kwargs)
-    operator.report({"INFO"}, "File " +
-                    ("overwritten" if file_exists else "exported") +
-                    ": " + file_name)
+    timings = OrderedDict()
+    write = yield from export_fbx_bin.save_single_steps(
+        operator, context.scene, filepath=file_path, context_objects=objects,
+        timings=timings, background=background,
+        **dict(checked_bake_kwargs(kwargs),
+               **scene_export_kwargs(context.scene),
+               **bone_export_kwargs(objects)))
+
+    def finish(operator):
+        # reloaded, as other files may have been written in the meantime
+        if content_hash is not None:
+            manifest = load_manifest(export_path)
+            manifest[file_name] = content_hash
+            save_manifest(export_path, manifest)
+
+        log_timings(export_path, file_name, timings)
+        if written is not None:
+            written()
+
+        operator.report({"INFO"}, "File " +
+                        ("overwritten" if file_exists else "exported") +
+                        ": " + file_name)
+
+    if background:
+        pending_writes.append((write, file_name, finish))
+        start_export_queue()
+    else:
+        finish(operator)
+    return timings
+
+
+def export_fbx(operator, context, objects, name, kwargs, content_hash=None):
+    """
+    Exports objects to fbx, with the given name and parameters,
+    under the scene export path, at once (see export_fbx_steps)\t\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context to use\t
+    :param objects: the list of objects to include in the exported file\t\t
+    :param name: the base name of the file to export\t
+    :param kwargs: a dict containing any additional parameters\t
+    :param content_hash: the hash of the exported content, to skip the export
+    if the file is unchanged since the last one\t
+    :returns: a dict of export phases to durations in seconds,
+    or None if nothing was written
+    """
 
+    return export_fbx_bin.fbx_run_steps(
+        export_fbx_steps(operator, context, objects, name, kwargs,
+                         content_hash))
 
-def export_action_sequence(operator, context, action):
+
+def start_export_queue():
+    """
+    Starts the operator running the export queue and reporting background
+    writes, unless it is already running\t
+    :return: nothing
     """
-    Exports a given action as an action sequence into an fbx file\t
+
+    if not export_queue_state["running"]:
+        bpy.ops.sg.run_export_queue("INVOKE_DEFAULT")
+
+
+def finish_pending_writes(operator, wait=False):
+    """
+    Reports the files written in the background, and records them in the
+    manifest\t
+    :param operator: the operator though which we report messages\t
+    :param wait: whether to wait for all the files to be written\t
+    :return: the number of files still being written
+    """
+
+    for pending in list(pending_writes):
+        write, file_name, finish = pending
+        if not wait and not write.done():
+            continue
+
+        pending_writes.remove(pending)
+        error = write.exception()
+        if error is not None:
+            operator.report({"ERROR"}, "Could not write " + file_name +
+                            ": " + str(error))
+        else:
+            finish(operator)
+
+    return len(pending_writes)
+
+
+def export_action_sequence_steps(operator, context, action, obj=None,
+                                 background=False, written=None):
+    """
+    Exports a given action as an action sequence into an fbx file,
+    yielding the export progress while baking it\t
     :param operator: the operator though which we report messages\t
     :param context: the context in which the action resides\t\t
     :param action: the action to export\t
+    :param obj: the armature animated by the action, the active object if
+    None\t
+    :param background: whether to write the file on a background thread\t
+    :param written: a function called without arguments once the file is
+    written, or found unchanged\t
     :return: nothing
     """
 
+    if obj is None:
+        obj = context.active_object
+
+    if obj.animation_data is None:
+        operator.report({"ERROR"}, obj.name + " has no animation data")
+        return
+
+    # the action is baked as played by the armature, restored afterwards
+    played = obj.animation_data.action
+    pose = None
+    if played != action:
+        bones = obj.pose.bones if obj.pose is not None else ()
+        pose = [(bone, bone.matrix_basis.copy()) for bone in bones]
+        obj.animation_data.action = action
+
     try:
         if not action.name.startswith("AS_"):
             operator.report({"WARNING"}, "Action name should start with 'AS_'")
 
-        export_fbx(operator, context, context.scene.objects,
-                   action.name, as_export_kwargs)
+        objects = action_export_objects(context, obj)
+        action_kwargs = action_hash_kwargs(context, objects)
+        content_hash = None
+        if operator.incremental:
+            content_hash = hash_action(obj, action, action_kwargs)
+            # the single action export bakes over the scene frame range
+            content_hash += "-%d-%d" % (context.scene.frame_start,
+                                        context.scene.frame_end)
+
+        export_fbx_bin.fbx_bake_cache.resize(
+            context.scene.bake_cache_size * 1024 * 1024)
+        kwargs = dict(as_export_kwargs,
+                      bake_cache_key=hash_bake(context, obj, action,
+                                               action_kwargs, objects))
+
+        yield from export_fbx_steps(operator, context, objects, action.name,
+                                    kwargs, content_hash, background,
+                                    written)
     except Exception as e:
         operator.report({"WARNING"}, str(e))
+    finally:
+        if pose is not None:
+            obj.animation_data.action = played
+            for bone, matrix in pose:
+                bone.matrix_basis = matrix
+            context.scene.frame_set(context.scene.frame_current)
 
 
-def export_skeletal_mesh(operator, context, objects, name):
+def export_action_sequence(operator, context, action):
+    """
+    Exports a given action of the active object as an action sequence into
+    an fbx file, at once (see export_action_sequence_steps)\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context in which the action resides\t\t
+    :param action: the action to export\t
+    :return: nothing
+    """
+
+    export_fbx_bin.fbx_run_steps(
+        export_action_sequence_steps(operator, context, action))
+
+
+def action_matches(obj, action):
+    """
+    Checks that all the fcurves of an action can be applied to an object\t
+    :param obj: the object that would use the action\t
+    :param action: the action to check\t
+    :return: True if every fcurve data path resolves on the object
+    """
+
+    for fcurve in action.fcurves:
+        try:
+            obj.path_resolve(fcurve.data_path)
+        except ValueError:
+            return False
+    return True
+
+
+def export_action_sequences_steps(operator, context, obj, actions,
+                                  written=None):
+    """
+    Exports the given actions of an object as action sequences,
+    one fbx file per action, gathering the scene only once, and yielding the
+    export progress while baking each action\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context in which the actions reside\t
+    :param obj: the object animated by the actions\t
+    :param actions: the list of actions to export\t
+    :param written: a function called with the name of each action whose
+    file is written, or found unchanged\t
+    :return: the list of written file names
+    """
+
+    export_path = str(context.scene.export_path)
+    manifest = load_manifest(export_path) if operator.incremental else None
+    hashes = {}
+    objects = action_export_objects(context, obj)
+    action_kwargs = action_hash_kwargs(context, objects)
+
+    actions_paths = []
+    for action in actions:
+        file_name = action.name + ".fbx"
+        file_path = join(export_path, file_name)
+        file_exists = exists(file_path)
+
+        if manifest is not None:
+            hashes[file_name] = hash_action(obj, action, action_kwargs)
+            if file_exists and manifest.get(file_name) == hashes[file_name]:
+                if written is not None:
+                    written(action.name)
+                continue
+
+        if file_exists and not operator.overwrite:
+            operator.report({"WARNING"}, "File exists: " + file_name)
+            continue
+
+        if not action_matches(obj, action):
+            operator.report({"WARNING"}, "Action does not match " +
+                            obj.name + ": " + action.name)
+            continue
+
+        actions_paths.append((action, file_path))
+
+    if not actions_paths:
+        return []
+
+    export_fbx_bin.fbx_bake_cache.resize(
+        context.scene.bake_cache_size * 1024 * 1024)
+    bake_cache_keys = {action.name: hash_bake(context, obj, action,
+                                              action_kwargs, objects)
+                       for action, file_path in actions_paths}
+
+    timings = OrderedDict()
+    try:
+        yield from export_fbx_bin.save_actions_steps(
+            operator, context.scene, obj, actions_paths,
+            context_objects=objects, timings=timings,
+            bake_cache_keys=bake_cache_keys,
+            **dict(checked_bake_kwargs(as_export_kwargs),
+                   **scene_export_kwargs(context.scene),
+                   **bone_export_kwargs(objects)))
+    except Exception as e:
+        operator.report({"WARNING"}, str(e))
+        return []
+
+    log_timings(export_path, str(len(actions_paths)) + " actions of " +
+                obj.name, timings)
+
+    if manifest is not None:
+        for action, file_path in actions_paths:
+            file_name = action.name + ".fbx"
+            manifest[file_name] = hashes[file_name]
+        save_manifest(export_path, manifest)
+
+    if written is not None:
+        for action, file_path in actions_paths:
+            written(action.name)
+
+    return [action.name + ".fbx" for action, file_path in actions_paths]
+
+
+def export_action_sequences(operator, context, obj, actions):
     """
-    Exports given objects as a skeletal mesh into an fbx file\t
+    Exports the given actions of an object as action sequences, at once
+    (see export_action_sequences_steps)\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context in which the actions reside\t
+    :param obj: the object animated by the actions\t
+    :param actions: the list of actions to export\t
+    :return: the list of written file names
+    """
+
+    return export_fbx_bin.fbx_run_steps(
+        export_action_sequences_steps(operator, context, obj, actions))
+
+
+def export_action_takes(operator, context, obj, actions):
+    """
+    Exports the given actions of an object into a single fbx file, each
+    action being a take of its own, the skeleton being written only once\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context in which the actions reside\t
+    :param obj: the object animated by the actions\t
+    :param actions: the list of actions to export\t
+    :return: the list of exported action names
+    """
+
+    export_path = str(context.scene.export_path)
+    file_name = "AS_" + obj.name + "_Takes.fbx"
+    file_path = join(export_path, file_name)
+    file_exists = exists(file_path)
+
+    takes = []
+    for action in actions:
+        if not action_matches(obj, action):
+            operator.report({"WARNING"}, "Action does not match " +
+                            obj.name + ": " + action.name)
+            continue
+        takes.append(action)
+
+    if not takes:
+        return []
+
+    objects = action_export_objects(context, obj)
+    action_kwargs = action_hash_kwargs(context, objects)
+    manifest = None
+    if operator.incremental:
+        manifest = load_manifest(export_path)
+        digest = hashlib.sha1()
+        for action in takes:
+            digest.update(hash_action(obj, action, action_kwargs).encode())
+        content_hash = digest.hexdigest()
+        if file_exists and manifest.get(file_name) == content_hash:
+            operator.report({"INFO"}, "File unchanged: " + file_name)
+            return []
+
+    if file_exists and not operator.overwrite:
+        operator.report({"ERROR"}, "File exists: " + file_name)
+        return []
+
+    export_fbx_bin.fbx_bake_cache.resize(
+        context.scene.bake_cache_size * 1024 * 1024)
+    bake_cache_keys = {action.name: hash_bake(context, obj, action,
+                                              action_kwargs, objects)
+                       for action in takes}
+
+    timings = OrderedDict()
+    try:
+        export_fbx_bin.save_takes(operator, context.scene, obj, takes,
+                                  file_path,
+                                  context_objects=objects,
+                                  timings=timings,
+                                  bake_cache_keys=bake_cache_keys,
+                                  **dict(checked_bake_kwargs(
+                                             as_export_kwargs),
+                                         **scene_export_kwargs(
+                                             context.scene),
+                                         **bone_export_kwargs(objects)))
+    except Exception as e:
+        operator.report({"WARNING"}, str(e))
+        return []
+
+    log_timings(export_path, file_name, timings)
+
+    if manifest is not None:
+        manifest[file_name] = content_hash
+        save_manifest(export_path, manifest)
+
+    operator.report({"INFO"}, "File " +
+                    ("overwritten" if file_exists else "exported") +
+                    ": " + file_name)
+    return [action.name for action in takes]
+
+
+def export_skeletal_mesh_steps(operator, context, objects, name,
+                               background=False, written=None):
+    """
+    Exports given objects as a skeletal mesh into an fbx file, as export
+    steps (see export_fbx_steps)\t
     :param operator: the operator though which we report messages\t
     :param context: the context in which the objects resides\t
     :param objects: the objects to export\t
     :param name: the name of the skeletal mesh asset\t
-    :return: nothing
+    :param background: whether to write the file on a background thread\t
+    :param written: a function called once the file is written\t
+    :return: the name of the written file, or None if nothing was written
     """
 
     mesh = None
@@ -157,11 +1088,328 @@ def export_skeletal_mesh(operator, context, objects, name):
         if armature.name != "root":
             operator.report({"WARNING"}, "Armature should be named 'root'")
 
-        export_fbx(operator, context, objects, name, sk_export_kwargs)
+        content_hash = None
+        if operator.incremental:
+            content_hash = hash_skeletal_mesh(objects, sk_export_kwargs)
+
+        timings = yield from export_fbx_steps(operator, context, objects,
+                                              name, sk_export_kwargs,
+                                              content_hash, background,
+                                              written)
+        return None if timings is None else str(name) + ".fbx"
     except Exception as e:
         operator.report({"WARNING"}, str(e))
 
 
+def export_skeletal_mesh(operator, context, objects, name):
+    """
+    Exports given objects as a skeletal mesh into an fbx file, at once
+    (see export_skeletal_mesh_steps)\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context in which the objects resides\t
+    :param objects: the objects to export\t
+    :param name: the name of the skeletal mesh asset\t
+    :return: the name of the written file, or None if nothing was written
+    """
+
+    return export_fbx_bin.fbx_run_steps(
+        export_skeletal_mesh_steps(operator, context, objects, name))
+
+
+def remember_action_sequence(scene, action, obj):
+    """
+    Remembers that an action was exported as an action sequence of an
+    armature, over the scene frame range, so that it is exported again the
+    same way automatically\t
+    :param scene: the scene holding the armature\t
+    :param action: the exported action\t
+    :param obj: the armature animated by the action\t
+    :return: nothing
+    """
+
+    if action_sequences_prop not in scene:
+        scene[action_sequences_prop] = {}
+    scene[action_sequences_prop][action.name] = obj.name
+
+
+def forget_action_sequences(scene, names):
+    """
+    Forgets that actions were exported as action sequences over the scene
+    frame range, once exported over their own frame range\t
+    :param scene: the scene remembering the action sequences\t
+    :param names: the names of the actions\t
+    :return: nothing
+    """
+
+    action_sequences = scene.get(action_sequences_prop)
+    if action_sequences is None:
+        return
+    for name in names:
+        if name in action_sequences:
+            del action_sequences[name]
+
+
+def remember_skeletal_mesh(scene, objects, name):
+    """
+    Remembers the objects of an exported skeletal mesh on the scene, so that
+    it can be exported again automatically\t
+    :param scene: the scene holding the objects\t
+    :param objects: the objects of the skeletal mesh\t
+    :param name: the name of the skeletal mesh asset\t
+    :return: nothing
+    """
+
+    types = {obj.type for obj in objects}
+    if "MESH" not in types or "ARMATURE" not in types:
+        return
+
+    if skeletal_meshes_prop not in scene:
+        scene[skeletal_meshes_prop] = {}
+    scene[skeletal_meshes_prop][name] = [obj.name for obj in objects]
+
+
+def queue_dirty_exports(scene) -> int:
+    """
+    Queues the export of the actions and skeletal meshes changed since the
+    last save, or not exported since they changed, each one being forgotten
+    about once exported (see export_job_steps)\t
+    :param scene: the scene holding the skeletal meshes\t
+    :return: the number of queued exports
+    """
+
+    # queued exports replace the previous files, unless unchanged, the same
+    # way as they were last exported
+    action_sequences = scene.get(action_sequences_prop, {})
+    dirty_actions = auto_export_dirty["actions"]
+    dirty_actions.intersection_update(bpy.data.actions.keys())
+    jobs = []
+    for name in sorted(dirty_actions):
+        if name in action_sequences:
+            jobs.append(ExportJob("action_sequence", name,
+                                  (action_sequences[name],), True, True))
+        else:
+            jobs.append(ExportJob("action", name, (), True, True))
+
+    dirty_objects = auto_export_dirty["objects"]
+    dirty_meshes = auto_export_dirty["skeletal_meshes"]
+    skeletal_meshes = scene.get(skeletal_meshes_prop, {})
+    for name in skeletal_meshes.keys():
+        if dirty_objects.intersection(skeletal_meshes[name]):
+            dirty_meshes.add(name)
+    dirty_objects.clear()
+    dirty_meshes.intersection_update(skeletal_meshes.keys())
+    for name in sorted(dirty_meshes):
+        jobs.append(ExportJob("skeletal_mesh", name,
+                              tuple(skeletal_meshes[name]), True, True))
+
+    jobs = [job for job in jobs if job not in export_queue]
+    export_queue.extend(jobs)
+    return len(jobs)
+
+
+def queue_export(job: ExportJob):
+    """
+    Queues an export, and starts running the export queue\t
+    :param job: the ExportJob to queue\t
+    :return: nothing
+    """
+
+    if job not in export_queue:
+        export_queue.append(job)
+    start_export_queue()
+
+
+def export_queue_progress() -> tuple:
+    """
+    Computes the progress of the running export queue\t
+    :return: the number of exports done (with the baked fraction of the
+    running one), the total number of exports, the exports per minute, and
+    the estimated seconds left, None until something is done
+    """
+
+    stats = export_queue_stats
+    done = stats["done"] + stats["fraction"]
+    total = stats["done"] + len(export_queue) + (stats["job"] is not None)
+    elapsed = time.perf_counter() - stats["start"]
+    rate = done * 60.0 / elapsed if elapsed > 0.0 else 0.0
+    left = (total - done) * elapsed / done if done > 0.0 else None
+    return done, total, rate, left
+
+
+def action_armature(scene, action):
+    """
+    Finds the armature to export an action with: the one playing it, or
+    else the one named 'root'\t
+    :param scene: the scene holding the armatures\t
+    :param action: the action to export\t
+    :return: the armature object, or None if not found
+    """
+
+    for obj in scene.objects:
+        if (obj.type == "ARMATURE" and obj.animation_data is not None and
+                obj.animation_data.action == action):
+            return obj
+    root = scene.objects.get("root")
+    if root is not None and root.type == "ARMATURE":
+        return root
+    return None
+
+
+def export_job_steps(operator, context, job: ExportJob):
+    """
+    Runs a queued export, yielding its progress while baking animations\t
+    :param operator: the operator though which we report messages\t
+    :param context: the context in which the exported data resides\t
+    :param job: the ExportJob to run\t
+    :return: nothing
+    """
+
+    scene = context.scene
+    objects = [scene.objects[n] for n in job.objects if n in scene.objects]
+
+    # only remembered for auto export, and forgotten about as changed, once
+    # successfully exported
+    if job.kind == "skeletal_mesh":
+        def written():
+            remember_skeletal_mesh(scene, objects, job.name)
+            auto_export_dirty["skeletal_meshes"].discard(job.name)
+
+        yield from export_skeletal_mesh_steps(operator, context, objects,
+                                              job.name, True, written)
+        return
+
+    action = bpy.data.actions.get(job.name)
+    if action is None:
+        operator.report({"WARNING"}, "Action not found: " + job.name)
+        return
+
+    if job.kind == "action_sequence":
+        if not objects:
+            operator.report({"ERROR"}, "Armature not found: " +
+                            ", ".join(job.objects))
+            return
+
+        def written():
+            remember_action_sequence(scene, action, objects[0])
+            auto_export_dirty["actions"].discard(job.name)
+
+        yield from export_action_sequence_steps(operator, context, action,
+                                                objects[0], True, written)
+
+    elif job.kind == "action":
+        armature = action_armature(scene, action)
+        if armature is None:
+            operator.report({"WARNING"}, "No armature to export " + job.name)
+            return
+        yield from export_action_sequences_steps(
+            operator, context, armature, [action],
+            auto_export_dirty["actions"].discard)
+
+
+# keyframe properties read and written in bulk through foreach_get/set
+keyframe_vectors = ("co", "handle_left", "handle_right")
+# keyframe enum properties, which foreach_get/set cannot access
+keyframe_enums = ("interpolation", "easing",
+                  "handle_left_type", "handle_right_type", "type")
+
+
+def read_keyframes(fcurve) -> dict:
+    """
+    Reads all the keyframes of an fcurve into arrays\t
+    :param fcurve: the fcurve to read\t
+    :return: a dict of keyframe property names to arrays, one row per key
+    """
+
+    points = fcurve.keyframe_points
+    count = len(points)
+    keys = {}
+
+    for attr in keyframe_vectors:
+        values = np.empty(count * 2, dtype=np.float32)
+        points.foreach_get(attr, values)
+        keys[attr] = values.reshape(count, 2)
+    for attr in keyframe_enums:
+        keys[attr] = np.array([getattr(point, attr) for point in points],
+                              dtype=object)
+
+    return keys
+
+
+def write_keyframes(fcurve, keys: dict, current: dict):
+    """
+    Replaces all the keyframes of an fcurve, resizing its keyframe points
+    from the end and only writing the enum values which differ\t
+    :param fcurve: the fcurve to write\t
+    :param keys: a dict of keyframe property names to arrays, as read by
+    read_keyframes, sorted by frame\t
+    :param current: the keys currently in the fcurve, as read by
+    read_keyframes\t
+    :return: nothing
+    """
+
+    points = fcurve.keyframe_points
+    old_count = len(points)
+    count = len(keys["co"])
+
+    if count > old_count:
+        points.add(count - old_count)
+    # removing from the end does not move the other keys
+    for index in range(old_count - 1, count - 1, -1):
+        points.remove(points[index], True)
+
+    for attr in keyframe_vectors:
+        points.foreach_set(attr, np.ascontiguousarray(keys[attr],
+                                                      dtype=np.float32)
+                           .ravel())
+
+    kept = min(old_count, count)
+    for attr in keyframe_enums:
+        values = current[attr][:kept]
+        if count > kept:
+            added = np.empty(count - kept, dtype=object)
+            added.fill(getattr(points[kept], attr))
+            values = np.concatenate((values, added))
+        for index in np.flatnonzero(keys[attr] != values):
+            setattr(points[index], attr, keys[attr][index])
+
+
+def select_keyframes(keys: dict, indices) -> dict:
+    """
+    Selects some keyframes of a set of keys\t
+    :param keys: a dict of keyframe property names to arrays\t
+    :param indices: the indices or boolean mask of the keys to select\t
+    :return: a dict of keyframe property names to arrays
+    """
+
+    return {attr: values[indices] for attr, values in keys.items()}
+
+
+def loop_keyframes(keys: dict, num_frames: int, offset: int) -> dict:
+    """
+    Duplicates keyframes one loop before, then shifts them all\t
+    :param keys: a dict of keyframe property names to arrays\t
+    :param num_frames: the length of the loop\t
+    :param offset: the amount of frames to shift the keys by\t
+    :return: a dict of keyframe property names to arrays, sorted by frame
+    """
+
+    frames = keys["co"][:, 0]
+    before = select_keyframes(keys, np.ones(len(frames), dtype=bool))
+    for attr in keyframe_vectors:
+        before[attr][:, 0] -= num_frames
+    # copies landing on an existing key are dropped, the key stays
+    before = select_keyframes(before,
+                              ~np.in1d(before["co"][:, 0], frames))
+
+    looped = {attr: np.concatenate((before[attr], keys[attr]))
+              for attr in keys}
+    for attr in keyframe_vectors:
+        looped[attr][:, 0] += offset
+
+    order = np.argsort(looped["co"][:, 0], kind="mergesort")
+    return select_keyframes(looped, order)
+
+
 class SgExportCurrentAction(bpy.types.Operator):
     """Export the active action of the selected object as an fbx file"""
 
@@ -170,6 +1418,7 @@ class SgExportCurrentAction(bpy.types.Operator):
     bl_options = {"REGISTER"}
 
     overwrite = bpy.props.BoolProperty(name="overwrite", default=False)
+    incremental = bpy.props.BoolProperty(name="skip unchanged", default=True)
 
     def run(self, context):
         active = context.active_object
@@ -188,7 +1437,59 @@ class SgExportCurrentAction(bpy.types.Operator):
             self.report({"ERROR"}, "Selected object has no active action")
             return
 
-        export_action_sequence(self, context, active.animation_data.action)
+        action = active.animation_data.action
+        queue_export(ExportJob("action_sequence", action.name, (active.name,),
+                               self.overwrite, self.incremental))
+        self.report({"INFO"}, "Export queued: " + action.name)
+
+    def execute(self, context):
+        self.run(context)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+class SgExportAllActions(bpy.types.Operator):
+    """Export all the AS_ actions of the selected object as fbx files"""
+
+    bl_idname = "sg.export_all_as"
+    bl_label = "Export all AS_ actions as action sequences"
+    bl_options = {"REGISTER"}
+
+    overwrite = bpy.props.BoolProperty(name="overwrite", default=False)
+    incremental = bpy.props.BoolProperty(name="skip unchanged", default=True)
+    single_file = bpy.props.BoolProperty(name="single file", default=False)
+
+    def run(self, context):
+        active = context.active_object
+        if active is None:
+            self.report({"ERROR"}, "No active object")
+            return
+
+        if active.type != "ARMATURE":
+            self.report({"WARNING"}, "You may want to select an armature")
+
+        if active.animation_data is None:
+            self.report({"ERROR"}, "Selected object has no animation data")
+            return
+
+        actions = [action for action in bpy.data.actions
+                   if action.name.startswith("AS_")]
+
+        if not actions:
+            self.report({"ERROR"}, "No action starting with 'AS_'")
+            return
+
+        if self.single_file:
+            exported = export_action_takes(self, context, active, actions)
+        else:
+            exported = export_action_sequences(self, context, active,
+                                               actions)
+            forget_action_sequences(context.scene,
+                                    [n[:-len(".fbx")] for n in exported])
+        self.report({"INFO"}, "Exported " + str(len(exported)) + " of " +
+                    str(len(actions)) + " actions")
 
     def execute(self, context):
         self.run(context)
@@ -206,11 +1507,15 @@ class SgExportSkeletalMesh(bpy.types.Operator):
     bl_options = {"REGISTER"}
 
     overwrite = bpy.props.BoolProperty(name="overwrite", default=False)
+    incremental = bpy.props.BoolProperty(name="skip unchanged", default=True)
     name = bpy.props.StringProperty(name="name", default="SK_Untitled")
 
     def run(self, context):
         objects = context.selected_objects
-        export_skeletal_mesh(self, context, objects, self.name)
+        queue_export(ExportJob("skeletal_mesh", self.name,
+                               tuple(obj.name for obj in objects),
+                               self.overwrite, self.incremental))
+        self.report({"INFO"}, "Export queued: " + self.name)
 
     def execute(self, context):
         self.run(context)
@@ -260,41 +1565,29 @@ class SgOffsetAction(bpy.types.Operator):
         else:
             offset = self.offset % num_frames
 
-        # copy keyframes before
         for fcurve in action.fcurves:
-            for kf in fcurve.keyframe_points:
-                fcurve.keyframe_points.insert(
-                    kf.co.x - num_frames, kf.co.y, {"FAST"})
+            keys = read_keyframes(fcurve)
+
+            # copy keyframes one loop before, and offset all keys and handles
+            looped = loop_keyframes(keys, num_frames, offset)
+            write_keyframes(fcurve, looped, keys)
             # from doc: `Ensure keyframes are sorted in chronological order
             # and handles are set correctly`
             fcurve.update()
 
-        # offset all keys and handles
-        for fcurve in action.fcurves:
-            for kf in fcurve.keyframe_points:
-                kf.co.x += offset
-                kf.handle_left.x += offset
-                kf.handle_right.x += offset
-            fcurve.update()
+            # values at start and end, across the loop
+            start_value = fcurve.evaluate(start)
+            end_value = fcurve.evaluate(end)
 
-        # add keys at start and end
-        for fcurve in action.fcurves:
-            # start
-            fcurve.keyframe_points.insert(
-                start, fcurve.evaluate(start), {"FAST"})
-            # end
-            fcurve.keyframe_points.insert(
-                end, fcurve.evaluate(end), {"FAST"})
-            fcurve.update()
+            # remove keys not in range
+            frames = looped["co"][:, 0]
+            in_range = select_keyframes(looped, (frames >= start) &
+                                        (frames <= end))
+            write_keyframes(fcurve, in_range, looped)
 
-        # remove keys not in range
-        for fcurve in action.fcurves:
-            # run backwards because we remove elements
-            for i in range(len(fcurve.keyframe_points), 0, -1):
-                kf = fcurve.keyframe_points[i - 1]
-                # if frame out of range
-                if kf.co.x < start or kf.co.x > end:
-                    fcurve.keyframe_points.remove(kf, True)
+            # add keys at start and end
+            fcurve.keyframe_points.insert(start, start_value, {"FAST"})
+            fcurve.keyframe_points.insert(end, end_value, {"FAST"})
             fcurve.update()
 
     def execute(self, context):
@@ -305,6 +1598,196 @@ class SgOffsetAction(bpy.types.Operator):
         return context.window_manager.invoke_props_dialog(self)
 
 
+def redraw_panels(context):
+    """
+    Redraws the 3D views, in which the panel shows the last export\t
+    :param context: the context holding the screen to redraw\t
+    :return: nothing
+    """
+
+    if context.screen is None:
+        return
+    for area in context.screen.areas:
+        if area.type == "VIEW_3D":
+            area.tag_redraw()
+
+
+@persistent
+def auto_export_update(scene):
+    """
+    Records the AS_ actions and the objects changed by the last update\t
+    :param scene: the updated scene\t
+    :return: nothing
+    """
+
+    if not scene.auto_export:
+        return
+
+    if bpy.data.actions.is_updated:
+        for action in bpy.data.actions:
+            if action.is_updated and action.name.startswith("AS_"):
+                auto_export_dirty["actions"].add(action.name)
+
+    if bpy.data.objects.is_updated:
+        for obj in scene.objects:
+            data = obj.data
+            if obj.is_updated or (data is not None and data.is_updated):
+                auto_export_dirty["objects"].add(obj.name)
+
+
+@persistent
+def auto_export_save(dummy):
+    """
+    Queues the export of what changed since the last save, and starts
+    running the export queue\t
+    :return: nothing
+    """
+
+    context = bpy.context
+    if not context.scene.auto_export:
+        return
+
+    if queue_dirty_exports(context.scene) and context.window is not None:
+        start_export_queue()
+
+
+@persistent
+def auto_export_load(dummy):
+    """
+    Forgets the changes and queued exports of the previous file\t
+    :return: nothing
+    """
+
+    for dirty in auto_export_dirty.values():
+        dirty.clear()
+    export_queue.clear()
+    export_queue_state["running"] = False
+    export_queue_stats.update(done=0, job=None, fraction=0.0)
+
+
+class QueuedOperator:
+    """Stands in for the operator which queued an export, reporting through
+    the operator running the queue"""
+
+    def __init__(self, operator, job: ExportJob):
+        self.operator = operator
+        self.overwrite = job.overwrite
+        self.incremental = job.incremental
+
+    def report(self, type, message):
+        self.operator.report(type, message)
+
+
+class SgRunExportQueue(bpy.types.Operator):
+    """Run the queued exports in the background of the UI, and report the
+    files written in the background. Press Esc to cancel the exports"""
+
+    bl_idname = "sg.run_export_queue"
+    bl_label = "Run the queued exports"
+    bl_options = {"REGISTER"}
+
+    _timer = None
+    # export steps of the running export
+    _steps = None
+
+    def step(self, context) -> bool:
+        """
+        Runs the next step of the running export, starting the next queued
+        export if none is running\t
+        :param context: the context in which the exported data resides\t
+        :return: False if there was nothing left to run
+        """
+
+        stats = export_queue_stats
+        if self._steps is None:
+            if not export_queue:
+                return False
+            job = export_queue.popleft()
+            stats.update(job=job, fraction=0.0)
+            self._steps = export_job_steps(QueuedOperator(self, job),
+                                           context, job)
+
+        try:
+            progress = next(self._steps)
+            if progress is not None:
+                stats["fraction"] = progress.frame / progress.nbr_frames
+            return True
+        except StopIteration:
+            pass
+        except Exception as e:
+            self.report({"ERROR"}, str(e))
+
+        self._steps = None
+        stats.update(done=stats["done"] + 1, job=None, fraction=0.0)
+        return True
+
+    def cancel_exports(self):
+        """
+        Stops the running export, restoring the scene, and forgets the
+        queued ones\t
+        :return: nothing
+        """
+
+        cancelled = len(export_queue)
+        if self._steps is not None:
+            self._steps.close()
+            self._steps = None
+            cancelled += 1
+        export_queue.clear()
+        export_queue_stats.update(job=None, fraction=0.0)
+        self.report({"WARNING"}, "Cancelled " + str(cancelled) + " exports")
+
+    def modal(self, context, event):
+        if event.type == "ESC" and (self._steps is not None or export_queue):
+            if event.value == "PRESS":
+                self.cancel_exports()
+        elif event.type != "TIMER":
+            # the scene must not be edited while an export bakes it
+            if self._steps is not None:
+                return {"RUNNING_MODAL"}
+            return {"PASS_THROUGH"}
+        else:
+            start = time.perf_counter()
+            while self.step(context):
+                if time.perf_counter() - start >= export_queue_slice:
+                    break
+
+        finish_pending_writes(self)
+        done, total, rate, left = export_queue_progress()
+        context.window_manager.progress_update(
+            100.0 * done / total if total else 100.0)
+        redraw_panels(context)
+
+        if self._steps is not None or export_queue or pending_writes:
+            return {"RUNNING_MODAL"} if event.type == "ESC" else \
+                {"PASS_THROUGH"}
+
+        context.window_manager.progress_end()
+        context.window_manager.event_timer_remove(self._timer)
+        export_queue_state["running"] = False
+        return {"FINISHED"}
+
+    def execute(self, context):
+        export_queue_stats.update(done=0, start=time.perf_counter())
+        while self.step(context):
+            pass
+        finish_pending_writes(self, wait=True)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        if export_queue_state["running"]:
+            return {"CANCELLED"}
+
+        export_queue_state["running"] = True
+        export_queue_stats.update(done=0, start=time.perf_counter(),
+                                  job=None, fraction=0.0)
+        context.window_manager.progress_begin(0.0, 100.0)
+        self._timer = context.window_manager.event_timer_add(
+            export_queue_slice, context.window)
+        context.window_manager.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+
 class SgToolsUi(bpy.types.Panel):
     """Defines the SonderGames Tools panel located on the left in 3D view"""
 
@@ -320,6 +1803,9 @@ class SgToolsUi(bpy.types.Panel):
         col_export = box_export.column(align=True)
         row_export_0_label = col_export.row()
         row_export_0 = col_export.row()
+        row_export_0_cache = col_export.row()
+        row_export_0_auto = col_export.row()
+        row_export_0_compression = col_export.row(align=True)
         row_export_1_label = col_export.row()
         row_export_1 = col_export.row()
         row_export_2_label = col_export.row()
@@ -327,13 +1813,54 @@ class SgToolsUi(bpy.types.Panel):
 
         row_export_0_label.label(text="Global Settings")
         row_export_0.prop(context.scene, "export_path")
+        row_export_0_cache.prop(context.scene, "bake_cache_size")
+        row_export_0_auto.prop(context.scene, "auto_export")
+        row_export_0_auto.prop(context.scene, "export_active_rig_only")
+        row_export_0_compression.prop(context.scene, "compression_threads")
+        row_export_0_compression.prop(context.scene, "compression_level")
         row_export_1_label.label(text="Action Sequence")
         row_export_1.operator(SgExportCurrentAction.bl_idname,
                               icon="ACTION", text="Export Active")
+        row_export_1.operator(SgExportAllActions.bl_idname,
+                              icon="ACTION", text="Export All")
         row_export_2_label.label(text="Skeletal Mesh")
         row_export_2.operator(SgExportSkeletalMesh.bl_idname,
                               icon="MESH_MONKEY", text="Export Selected")
 
+        # bones box
+        obj = context.active_object
+        if obj is not None and obj.type == "ARMATURE":
+            self.layout.label(text="Exported bones")
+            box_bones = self.layout.box()
+            col_bones = box_bones.column(align=True)
+            col_bones.prop(obj, "sg_bones_exclude")
+            col_bones.prop(obj, "sg_bones_exclude_groups")
+            col_bones.prop(obj, "sg_bones_keep")
+            col_bones.prop(obj, "sg_bones_deform_only")
+            col_bones.label(text="%d of %d bones excluded" %
+                            (len(excluded_bones(obj)), len(obj.pose.bones)))
+
+        # export queue box
+        if export_queue_state["running"]:
+            done, total, rate, left = export_queue_progress()
+            self.layout.label(text="Export queue")
+            box_queue = self.layout.box()
+            col_queue = box_queue.column(align=True)
+            job = export_queue_stats["job"]
+            if job is not None:
+                col_queue.label(text="Exporting " + job.name, icon="TIME")
+            col_queue.label(text="%d of %d exports done" % (done, total))
+            row_queue_rate = col_queue.row()
+            row_queue_rate.label(text="%.1f per minute" % rate)
+            if left is not None:
+                row_queue_rate.label(text="%d:%02d left" %
+                                     divmod(int(left + 0.5), 60))
+            if pending_writes:
+                col_queue.label(text="Writing %d file(s)..." %
+                                len(pending_writes))
+            if job is not None or export_queue:
+                col_queue.label(text="Press Esc to cancel")
+
         # import box
         self.layout.label(text="Tools")
         box_import = self.layout.box()
@@ -343,6 +1870,19 @@ class SgToolsUi(bpy.types.Panel):
         row_import_0.operator(SgOffsetAction.bl_idname, icon="ARROW_LEFTRIGHT",
                               text="Offset action")
 
+        # timings box
+        if last_export["timings"]:
+            self.layout.label(text="Last export timings")
+            box_timings = self.layout.box()
+            col_timings = box_timings.column(align=True)
+            col_timings.label(text=last_export["name"])
+            for phase, duration in last_export["timings"].items():
+                row = col_timings.row()
+                row.label(text=phase.replace("_", " ").capitalize())
+                row.label(text="%.3f s" % duration)
+            col_timings.label(text="Total: %.3f s" %
+                              sum(last_export["timings"].values()))
+
 
 def register():
     bpy.types.Scene.export_path = bpy.props.StringProperty(
@@ -351,19 +1891,394 @@ def register():
         description="Define the export path of fbx files",
         subtype="DIR_PATH"
     )
+    bpy.types.Scene.bake_cache_size = bpy.props.IntProperty(
+        name="Bake cache (MB)",
+        default=256,
+        min=0,
+        description="Memory used to keep baked actions between exports"
+    )
+    bpy.types.Scene.compression_threads = bpy.props.IntProperty(
+        name="Threads",
+        default=4,
+        min=0,
+        max=64,
+        description="Threads compressing the fbx arrays "
+                    "(0 to compress them on the main thread)"
+    )
+    bpy.types.Scene.compression_level = bpy.props.IntProperty(
+        name="Level",
+        default=1,
+        min=1,
+        max=9,
+        description="Compression level of the fbx arrays"
+    )
+    bpy.types.Scene.auto_export = bpy.props.BoolProperty(
+        name="Auto export on save",
+        default=False,
+        description="Export the AS_ actions and skeletal meshes changed "
+                    "since the last save, each time the file is saved"
+    )
+    bpy.types.Scene.export_active_rig_only = bpy.props.BoolProperty(
+        name="Active rig only",
+        default=False,
+        description="Export and bake actions with their armature and the "
+                    "objects driving it only, instead of the whole scene"
+    )
+    bpy.types.Object.sg_bones_exclude = bpy.props.StringProperty(
+        name="Exclude",
+        default="",
+        description="Comma separated name patterns of the bones left out "
+                    "of the exports (e.g. *twist*, IK_*, MCH-*)"
+    )
+    bpy.types.Object.sg_bones_exclude_groups = bpy.props.StringProperty(
+        name="Exclude groups",
+        default="",
+        description="Comma separated names of the bone groups left out "
+                    "of the exports"
+    )
+    bpy.types.Object.sg_bones_keep = bpy.props.StringProperty(
+        name="Keep",
+        default="",
+        description="Comma separated name patterns of the bones exported "
+                    "even if excluded"
+    )
+    bpy.types.Object.sg_bones_deform_only = bpy.props.BoolProperty(
+        name="Deform bones only",
+        default=False,
+        description="Leave the bones not deforming meshes out of the "
+                    "exports"
+    )
     bpy.utils.register_class(SgExportCurrentAction)
+    bpy.utils.register_class(SgExportAllActions)
     bpy.utils.register_class(SgExportSkeletalMesh)
     bpy.utils.register_class(SgToolsUi)
     bpy.utils.register_class(SgOffsetAction)
+    bpy.utils.register_class(SgRunExportQueue)
+    bpy.app.handlers.scene_update_post.append(auto_export_update)
+    bpy.app.handlers.save_post.append(auto_export_save)
+    bpy.app.handlers.load_post.append(auto_export_load)
 
 
 def unregister():
+    bpy.app.handlers.load_post.remove(auto_export_load)
+    bpy.app.handlers.save_post.remove(auto_export_save)
+    bpy.app.handlers.scene_update_post.remove(auto_export_update)
+    bpy.utils.unregister_class(SgRunExportQueue)
     bpy.utils.unregister_class(SgOffsetAction)
     bpy.utils.unregister_class(SgToolsUi)
     bpy.utils.unregister_class(SgExportSkeletalMesh)
+    bpy.utils.unregister_class(SgExportAllActions)
     bpy.utils.unregister_class(SgExportCurrentAction)
+    del bpy.types.Object.sg_bones_deform_only
+    del bpy.types.Object.sg_bones_keep
+    del bpy.types.Object.sg_bones_exclude_groups
+    del bpy.types.Object.sg_bones_exclude
+    del bpy.types.Scene.export_active_rig_only
+    del bpy.types.Scene.auto_export
+    del bpy.types.Scene.compression_level
+    del bpy.types.Scene.compression_threads
+    del bpy.types.Scene.bake_cache_size
     del bpy.types.Scene.export_path
 
 
-if __name__ == "__main__":
+class CliOperator:
+    """Stands in for an operator when exporting from the command line"""
+
+    def __init__(self, overwrite, incremental):
+        self.overwrite = overwrite
+        self.incremental = incremental
+        self.messages = []
+
+    def report(self, type, message):
+        level = sorted(type)[0]
+        self.messages.append([level, message])
+        print(level + ": " + message)
+
+
+def cli_select_actions(patterns: list, armature) -> list:
+    """
+    Finds the actions matching any of the given names or glob patterns,
+    which can be applied to the armature\t
+    :param patterns: the list of names or glob patterns\t
+    :param armature: the armature animated by the actions\t
+    :return: the list of matching actions, sorted by name
+    """
+
+    return [action for action in sorted(bpy.data.actions,
+                                         key=lambda a: a.name)
+            if any(fnmatchcase(action.name, p) for p in patterns) and
+            action_matches(armature, action)]
+
+
+def cli_select_objects(parser, names: list) -> list:
+    """
+    Finds the objects named on the command line, exiting with an error if
+    any is missing\t
+    :param parser: the ArgumentParser reporting the error\t
+    :param names: the list of object names\t
+    :return: the list of objects
+    """
+
+    for n in names:
+        if n not in bpy.data.objects:
+            parser.error("unknown object %r" % n)
+    return [bpy.data.objects[n] for n in names]
+
+
+def cli_select_skeletal_meshes(parser, specs: list) -> list:
+    """
+    Parses the skeletal mesh specifications given on the command line\t
+    :param parser: the ArgumentParser reporting unknown objects\t
+    :param specs: a list of 'NAME=OBJECT,OBJECT' strings\t
+    :return: a list of (name, objects) pairs
+    """
+
+    meshes = []
+    for spec in specs:
+        name, _, names = spec.partition("=")
+        meshes.append((name, cli_select_objects(parser, names.split(","))))
+    return meshes
+
+
+def cli_export(operator, context, armature, actions, meshes) -> dict:
+    """
+    Exports actions and skeletal meshes in the current process\t
+    :param operator: the CliOperator though which we report messages\t
+    :param context: the context to use\t
+    :param armature: the armature animated by the actions\t
+    :param actions: the list of actions to export\t
+    :param meshes: a list of (name, objects) skeletal meshes to export\t
+    :return: the report, as a dict
+    """
+
+    start = time.time()
+    exported = []
+
+    if actions:
+        exported += export_action_sequences(operator, context, armature,
+                                            actions)
+    for name, objects in meshes:
+        file_name = export_skeletal_mesh(operator, context, objects, name)
+        if file_name is not None:
+            exported.append(file_name)
+
+    return {"exported": exported,
+            "messages": operator.messages,
+            "time": time.time() - start}
+
+
+def cli_export_workers(operator, context, armature, actions, meshes,
+                       workers) -> dict:
+    """
+    Splits the export of actions and skeletal meshes across child Blender
+    processes, and merges their reports. Unchanged assets are filtered
+    out here so that only this process reads and writes the manifest\t
+    :param operator: the CliOperator though which we report messages\t
+    :param context: the context to use\t
+    :param armature: the armature animated by the actions\t
+    :param actions: the list of actions to export\t
+    :param meshes: a list of (name, objects) skeletal meshes to export\t
+    :param workers: the number of child processes to start\t
+    :return: the merged report, as a dict
+    """
+
+    start = time.time()
+    export_path = str(context.scene.export_path)
+    manifest = load_manifest(export_path) if operator.incremental else None
+    hashes = {}
+
+    if manifest is not None:
+        action_kwargs = action_hash_kwargs(
+            context, action_export_objects(context, armature))
+        for action in actions:
+            hashes[action.name + ".fbx"] = hash_action(armature, action,
+                                                       action_kwargs)
+        for name, objects in meshes:
+            hashes[name + ".fbx"] = hash_skeletal_mesh(objects,
+                                                       sk_export_kwargs)
+
+        def changed(file_name):
+            return not (exists(join(export_path, file_name)) and
+                        manifest.get(file_name) == hashes[file_name])
+
+        actions = [a for a in actions if changed(a.name + ".fbx")]
+        meshes = [m for m in meshes if changed(m[0] + ".fbx")]
+
+    jobs_dir = tempfile.mkdtemp(prefix="sg_export_")
+    try:
+        exported, workers_reports = cli_run_workers(
+            operator, armature, actions, meshes, workers, export_path,
+            jobs_dir)
+    finally:
+        shutil.rmtree(jobs_dir, ignore_errors=True)
+
+    if manifest is not None and exported:
+        for file_name in exported:
+            manifest[file_name] = hashes[file_name]
+        save_manifest(export_path, manifest)
+
+    return {"exported": exported,
+            "messages": operator.messages,
+            "time": time.time() - start,
+            "workers": workers_reports}
+
+
+def cli_run_workers(operator, armature, actions, meshes, workers,
+                    export_path, jobs_dir) -> tuple:
+    """
+    Starts the child Blender processes exporting slices of the actions and
+    skeletal meshes, and waits for their reports\t
+    :param operator: the CliOperator though which we report messages\t
+    :param armature: the armature animated by the actions\t
+    :param actions: the list of actions to export\t
+    :param meshes: a list of (name, objects) skeletal meshes to export\t
+    :param workers: the number of child processes to start\t
+    :param export_path: the folder in which to export\t
+    :param jobs_dir: the folder in which to write the job files\t
+    :return: the list of exported file names and the workers reports
+    """
+
+    processes = []
+    for index in range(workers):
+        job = {"actions": [a.name for a in actions[index::workers]],
+               "skeletal_meshes": [[name, [o.name for o in objects]]
+                                   for name, objects in
+                                   meshes[index::workers]],
+               "report": join(jobs_dir, "report_%d.json" % index)}
+        if not job["actions"] and not job["skeletal_meshes"]:
+            continue
+
+        job_path = join(jobs_dir, "job_%d.json" % index)
+        with open(job_path, "w") as job_file:
+            json.dump(job, job_file)
+
+        command = [bpy.app.binary_path, "--background", bpy.data.filepath,
+                   "--python", abspath(__file__), "--",
+                   "--export-path", export_path,
+                   "--no-incremental", "--job", job_path]
+        if armature is not None:
+            command += ["--armature", armature.name]
+        if operator.overwrite:
+            command.append("--overwrite")
+        if bake_check["enabled"]:
+            command.append("--check-bake")
+        processes.append((index, job["report"], subprocess.Popen(command)))
+
+    exported = []
+    workers_reports = []
+    for index, report_path, process in processes:
+        code = process.wait()
+        if not exists(report_path):
+            operator.report({"ERROR"}, "Worker " + str(index) +
+                            " failed with code " + str(code))
+            continue
+
+        with open(report_path, "r") as report_file:
+            report = json.load(report_file)
+        report["worker"] = index
+        workers_reports.append(report)
+        exported += report["exported"]
+        operator.messages += report["messages"]
+
+    return exported, workers_reports
+
+
+def cli_main(argv: list):
+    """
+    Command line entry point, used through
+    `blender --background file.blend --python sondergames.py -- ...`\t
+    :param argv: the arguments following `--`\t
+    :return: nothing, exits with 1 if any error was reported
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="blender --background file.blend --python sondergames.py --",
+        description="Export action sequences and skeletal meshes to fbx")
+    parser.add_argument("--export-path",
+                        help="folder in which to export, "
+                             "the scene export path by default")
+    parser.add_argument("--armature",
+                        help="armature animated by the actions, "
+                             "the active object by default")
+    parser.add_argument("--actions", nargs="*", default=[],
+                        metavar="PATTERN",
+                        help="names or glob patterns of actions to export")
+    parser.add_argument("--skeletal-mesh", action="append", default=[],
+                        metavar="NAME=OBJECT,OBJECT",
+                        help="skeletal mesh to export, can be repeated")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of Blender processes to export with")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="overwrite existing files")
+    parser.add_argument("--no-incremental", dest="incremental",
+                        action="store_false",
+                        help="export even the unchanged assets")
+    parser.add_argument("--check-bake", action="store_true",
+                        help="bake the actions from their fcurves and by "
+                             "evaluating the scene, and report their "
+                             "differences")
+    parser.add_argument("--report", help="path of the JSON report to write")
+    parser.add_argument("--job", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
     register()
+    context = bpy.context
+    if args.check_bake:
+        bake_check["enabled"] = True
+    if args.export_path is not None:
+        context.scene.export_path = args.export_path
+
+    if args.armature:
+        armature = bpy.data.objects.get(args.armature)
+        if armature is None:
+            parser.error("no object named " + args.armature)
+    else:
+        armature = context.active_object
+    operator = CliOperator(args.overwrite, args.incremental)
+
+    job = None
+    if args.job is not None:
+        with open(args.job, "r") as job_file:
+            job = json.load(job_file)
+        args.report = job["report"]
+
+    if (job["actions"] if job is not None else args.actions) and \
+            (armature is None or armature.type != "ARMATURE"):
+        parser.error("no armature to export the actions with")
+
+    if job is not None:
+        for name in job["actions"]:
+            if name not in bpy.data.actions:
+                parser.error("unknown action %r" % name)
+        actions = [bpy.data.actions[name] for name in job["actions"]]
+        meshes = [(name, cli_select_objects(parser, names))
+                  for name, names in job["skeletal_meshes"]]
+    else:
+        actions = cli_select_actions(args.actions, armature)
+        meshes = cli_select_skeletal_meshes(parser, args.skeletal_mesh)
+
+    if args.workers > 1 and not bpy.data.filepath:
+        parser.error("the blend file must be saved to export with workers")
+
+    if args.workers > 1:
+        report = cli_export_workers(operator, context, armature, actions,
+                                    meshes, args.workers)
+    else:
+        report = cli_export(operator, context, armature, actions, meshes)
+
+    print("Exported " + str(len(report["exported"])) + " files in " +
+          "%.2f" % report["time"] + " sec")
+
+    if args.report is not None:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=4)
+
+    if any(level == "ERROR" for level, message in report["messages"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if "--" in sys.argv:
+        cli_main(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        register()